@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import ORJSONResponse, RedirectResponse
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
+import asyncio
 
 from src.web.routers import (
     analysis_assistant_datasets,
@@ -20,17 +21,22 @@ from src.web.routers import (
 # https://fastapi.tiangolo.com/advanced/events/#lifespan
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    pass
     # startup events
-    #pipe_components = generate_components(settings.components)
-    #app.state.service_container = create_service_container(pipe_components, settings)
-    #app.state.service_metadata = create_service_metadata(pipe_components)
+    from src.langgraph.text2insight.text2insight_graph import Text2InsightGraph
+    from src.utils.spacy_util import spacy_util
+    # The graph is compiled once and shared by every request
+    app.state.chat_query_parsing_graph = Text2InsightGraph().build_chat_query_parsing_graph()
+    # Warm the alias lexicon so the first question doesn't pay for it; it loads on first use if this fails
+    try:
+        await asyncio.to_thread(spacy_util.warm_up)
+    except Exception as e:
+        print(f"Lexicon not loaded at startup: {e}")
 
-    #yield
+    yield
 
 app = FastAPI(
     title="genius-bi-server API Docs",
-    #lifespan=lifespan,
+    lifespan=lifespan,
     redoc_url=None,
     default_response_class=ORJSONResponse)
 
@@ -0,0 +1,73 @@
+"""
+Recall and latency of semantic alias matching against the trie-only path.
+
+Run from genius-bi-server:  python -m benchmarks.alias_semantic [model] [aliases]
+Needs a spaCy model with word vectors installed (default en_core_web_md).
+Aliases are built from words of the vectors table; each query swaps one alias
+word for its nearest neighbour in vector space, which the trie cannot match.
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from src.models.nature import Nature, NatureKind
+from src.utils.alias_vectors import AliasVectors, get_vectors_nlp
+from src.utils.spacy_util import SentenceTrie
+from src.utils.typo_index import TypoIndex
+
+def vector_words(model: str, count: int) -> list:
+    """Lowercase alphabetic words that have a vector"""
+    vocab = get_vectors_nlp(model).vocab
+    words = sorted({vocab.strings[key] for key in vocab.vectors.keys()
+                    if key in vocab.strings and vocab.strings[key].isalpha() and vocab.strings[key].islower()})
+    return words[:count]
+
+def measure(model: str, count: int, queries: int = 200) -> None:
+    rng = random.Random(5)
+    vocab = get_vectors_nlp(model).vocab
+    words = vector_words(model, count * 2)
+    aliases = {}
+    while len(aliases) < count:
+        aliases.setdefault(" ".join(rng.sample(words, rng.randint(1, 3))), Nature.of(NatureKind.METRIC, 1, len(aliases)))
+
+    trie = SentenceTrie()
+    for sentence, nature in aliases.items():
+        trie.insert(sentence, nature)
+    trie.compile()
+    typo_index = TypoIndex(trie.vocabulary())
+    start = time.perf_counter()
+    alias_vectors = AliasVectors.build(model, aliases.items())
+    build_seconds = time.perf_counter() - start
+
+    samples = []
+    for sentence in rng.sample(sorted(aliases), queries):
+        tokens = sentence.split()
+        i = rng.randrange(len(tokens))
+        keys, _, _ = vocab.vectors.most_similar(np.asarray([vocab.get_vector(tokens[i])]), n=5)
+        neighbours = [vocab.strings[int(key)].lower() for key in keys[0] if int(key) in vocab.strings]
+        neighbours = [word for word in neighbours if word.isalpha() and word != tokens[i]]
+        if neighbours:
+            tokens[i] = neighbours[0]
+            samples.append((aliases[sentence], " ".join(tokens)))
+
+    trie_hits, start = 0, time.perf_counter()
+    for nature, query in samples:
+        matches = trie.match_prefixes(typo_index.correct(trie.tokenize(query), trie), 0.9)
+        trie_hits += any(match_nature == nature for _, match_nature, _ in matches)
+    trie_ms = (time.perf_counter() - start) / len(samples) * 1000
+
+    semantic_hits, start = 0, time.perf_counter()
+    for nature, query in samples:
+        matches = alias_vectors.search([query], 1, 0.8)
+        semantic_hits += any(match_nature == nature for _, _, match_nature, _ in matches)
+    semantic_ms = (time.perf_counter() - start) / len(samples) * 1000
+
+    print(f"{count:>8} aliases  embed {build_seconds:6.2f}s {alias_vectors.matrix.nbytes / 2**20:6.1f} MiB  "
+          f"trie recall {trie_hits / len(samples):4.0%} {trie_ms:6.2f}ms  semantic recall {semantic_hits / len(samples):4.0%} {semantic_ms:6.2f}ms")
+
+if __name__ == "__main__":
+    model = sys.argv[1] if len(sys.argv) > 1 else "en_core_web_md"
+    for size in [int(arg) for arg in sys.argv[2:]] or [1_000, 10_000, 100_000]:
+        measure(model, size)
@@ -0,0 +1,51 @@
+"""
+Few-shot example lookup latency of the ExampleStore TF-IDF index.
+
+Run from genius-bi-server:  python -m benchmarks.example_lookup [sizes...]
+Stores synthetic metric/dimension questions (in memory only) and reports build
+time, per-lookup latency, and how often a question asked again in other word
+order and case comes back first and would be reused without the LLM.
+"""
+import random
+import sys
+import time
+
+from src.utils.example_store import ExampleStore
+
+FILLER = ["show", "me", "the", "total", "what", "is", "of", "in", "per", "please"]
+
+def synthetic_question(rng: random.Random) -> str:
+    words = rng.sample(FILLER, 3) + [f"metric{rng.randrange(200)}", "by", f"dim{rng.randrange(300)}",
+                                     f"value{rng.randrange(5000)}", str(rng.randint(2015, 2025))]
+    rng.shuffle(words)
+    return " ".join(words)
+
+def measure(count: int, queries: int = 2000) -> None:
+    rng = random.Random(5)
+    store = ExampleStore("", count)
+    questions = [synthetic_question(rng) for _ in range(count)]
+    start = time.perf_counter()
+    for question in questions:
+        store.add(1, question, "select 1", "", "2025-06-05")
+    build_seconds = time.perf_counter() - start
+
+    samples = []
+    queries = min(queries, count)
+    for question in rng.sample(questions, queries):
+        words = question.split()
+        rng.shuffle(words)
+        samples.append((question, " ".join(words).upper()))
+    start = time.perf_counter()
+    hits = reused = 0
+    for question, asked in samples:
+        found = store.search(1, asked, 3)
+        hits += bool(found) and found[0][1].question == question
+        reused += store.reusable(asked, found, 0.95) is not None
+    lookup_us = (time.perf_counter() - start) / queries * 1e6
+
+    print(f"{count:>9} examples  build {build_seconds:6.2f}s  lookup {lookup_us:8.1f}us  "
+          f"top-1 {hits / queries:4.0%}  reused {reused / queries:4.0%}")
+
+if __name__ == "__main__":
+    for size in [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]:
+        measure(size)
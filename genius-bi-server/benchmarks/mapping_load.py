@@ -0,0 +1,127 @@
+"""
+Semantic mapping under concurrent questions, with the metadata database answering slowly.
+
+Run from genius-bi-server:  python -m benchmarks.mapping_load [latency_ms] [concurrency...]
+Serves the metadata tables from memory after latency_ms (sleeping the calling
+thread for the sync helper, awaiting for the async one) and keeps that many
+questions over many datasets in flight, with the lexicon stamp check due on
+every question and most dataset tries cold. Reports throughput, latency
+percentiles, event loop lag and the peak number of database reads blocking a
+thread at once: sync reads reached through asyncio.to_thread queue on the
+default executor, min(32, cpu_count + 4) threads, async ones on nothing.
+"""
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+from src import settings
+from src.langgraph.text2insight.semantic_mapping_graph_node import execute_semantic_mapping
+from src.utils import semantic_catalog as semantic_catalog_module
+from src.utils import spacy_util as spacy_util_module
+from src.utils.plan_cache import FIELDS_VERSIONS_SQL
+from src.utils.semantic_catalog import SemanticCatalogRegistry
+from src.utils.spacy_util import SpacyUtil
+
+MODELS, DIMENSIONS, METRICS, DATASETS, QUESTIONS = 50, 20, 10, 2_000, 2_000
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float("nan")
+
+class MetadataTables:
+    """Synthetic models, fields and datasets, answering each query after latency seconds"""
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.blocking, self.peak_blocking = 0, 0
+        self._lock = threading.Lock()
+        self.dimensions = [{"id": model * 100 + i, "model_id": model, "name": f"d{model}_{i}", "alias": f"dimension {model} {i}",
+                            "field_type": "", "express": ""} for model in range(1, MODELS + 1) for i in range(DIMENSIONS)]
+        self.metrics = [{"id": model * 100 + DIMENSIONS + i, "model_id": model, "name": f"m{model}_{i}", "alias": f"metric {model} {i}",
+                         "field_type": "sum", "express": ""} for model in range(1, MODELS + 1) for i in range(METRICS)]
+    def model_of(self, dataset_id) -> int:
+        return int(dataset_id) % MODELS + 1
+    def rows(self, sql: str, params) -> list:
+        if sql == spacy_util_module.LEXICON_VERSION_SQL:
+            return [{"version": "v1"}]
+        if sql == spacy_util_module.LEXICON_SQL:
+            return [{"word": row["alias"], "nature": f"_{row['model_id']}_{row['id']}_{kind}"}
+                    for rows, kind in [(self.dimensions, "dimension"), (self.metrics, "metric")] for row in rows]
+        if sql == spacy_util_module.DATASET_FIELDS_SQL:
+            model = self.model_of(params["dataset_id"])
+            return [{"field_id": row["id"], "kind": kind} for rows, kind in [(self.dimensions, "dimension"), (self.metrics, "metric")]
+                    for row in rows if row["model_id"] == model]
+        if sql == FIELDS_VERSIONS_SQL:
+            return [{"dataset_id": dataset_id, "version": "f1"} for dataset_id in range(DATASETS)]
+        if sql == semantic_catalog_module.MODELS_SQL:
+            return [{"id": model, "table_name": f"table_{model}"} for model in range(1, MODELS + 1)]
+        if sql == semantic_catalog_module.DIMENSIONS_SQL:
+            return self.dimensions
+        if sql == semantic_catalog_module.METRICS_SQL:
+            return self.metrics
+        if sql == semantic_catalog_module.DATASET_FIELDS_SQL:
+            return [{"dataset_id": dataset_id, "field_id": row["id"], "kind": kind} for dataset_id in range(DATASETS)
+                    for rows, kind in [(self.dimensions, 1), (self.metrics, 2)] for row in rows if row["model_id"] == self.model_of(dataset_id)]
+        raise ValueError(sql)
+    def execute_sql_ext(self, sql: str, params=None) -> list:
+        with self._lock:
+            self.blocking += 1
+            self.peak_blocking = max(self.peak_blocking, self.blocking)
+        time.sleep(self.latency)
+        with self._lock:
+            self.blocking -= 1
+        return self.rows(sql, params)
+    async def execute_sql_ext_async(self, sql: str, params=None) -> list:
+        await asyncio.sleep(self.latency)
+        return self.rows(sql, params)
+
+async def measure(latency_ms: float, concurrency: int) -> None:
+    tables = MetadataTables(latency_ms / 1000)
+    spacy_util_module.execute_sql_ext = tables.execute_sql_ext
+    if hasattr(spacy_util_module, "execute_sql_ext_async"):
+        spacy_util_module.execute_sql_ext_async = tables.execute_sql_ext_async
+    semantic_catalog_module.execute_sql_ext_async = tables.execute_sql_ext_async
+    # A fresh lexicon and catalog per run, as after a deployment
+    spacy_util_module.spacy_util.__init__()
+    semantic_catalog_module.semantic_catalog.__init__()
+    spacy_util_module.spacy_util.load()
+    await semantic_catalog_module.semantic_catalog.get()
+
+    rng = random.Random(5)
+    questions = [(f"metric {model} 1 by dimension {model} 2", dataset_id)
+                 for dataset_id in (rng.randrange(DATASETS) for _ in range(QUESTIONS)) for model in [tables.model_of(dataset_id)]]
+    latencies, lags = [], []
+    done = False
+
+    async def ticker():
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - start - 0.005)
+
+    async def ask():
+        while questions:
+            query, dataset_id = questions.pop()
+            start = time.perf_counter()
+            await execute_semantic_mapping({"query": query, "dataset_id": dataset_id, "plan_info": {"version": "f1#t1"}})
+            latencies.append(time.perf_counter() - start)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(ask() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    done = True
+    await tick
+    print(f"{concurrency:>5} in flight  {QUESTIONS / seconds:8.1f} q/s  p50 {percentile(latencies, 0.5) * 1000:7.1f}ms "
+          f"p95 {percentile(latencies, 0.95) * 1000:7.1f}ms  loop lag p99 {percentile(lags, 0.99) * 1000:6.1f}ms "
+          f"max {max(lags, default=0) * 1000:6.1f}ms  blocking db reads peak {tables.peak_blocking}")
+
+if __name__ == "__main__":
+    settings.LEXICON_SNAPSHOT_PATH = ""
+    settings.LEXICON_CHECK_SECONDS = 0
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    print(f"db latency {latency_ms}ms, default executor {min(32, (os.cpu_count() or 1) + 4)} threads")
+    for level in [int(arg) for arg in sys.argv[2:]] or [1, 8, 32, 128]:
+        asyncio.run(measure(latency_ms, level))
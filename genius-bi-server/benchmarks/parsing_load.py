@@ -0,0 +1,56 @@
+"""
+Load test of /chat-assistants/parsing against a running server.
+
+Run from genius-bi-server:  python -m benchmarks.parsing_load [base_url] [concurrency...]
+For every concurrency level, keeps that many questions in flight for a fixed
+duration while probing a cheap CRUD endpoint, and reports parsing throughput,
+latency percentiles and the CRUD probe latency. With the sync handler the
+probe stalls once the server thread pool is busy; with the async path it
+stays flat and parsing throughput is bounded by the LLM semaphore instead.
+Start the server with GENIUS_BI_FAKE_LLM=1 to run it without DashScope access.
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+QUESTION = {"query": "show me the total tpv in 2024 of transaction time", "chat_id": "1"}
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float("nan")
+
+async def measure(base_url: str, concurrency: int, seconds: float = 30.0) -> None:
+    latencies, probes, errors = [], [], 0
+    deadline = time.perf_counter() + seconds
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        async def ask():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post("/chat-assistants/parsing", json=QUESTION)
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        async def probe():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await client.get("/llms/", params={"page": 1, "size": 1})
+                probes.append(time.perf_counter() - start)
+                await asyncio.sleep(0.5)
+
+        await asyncio.gather(probe(), *(ask() for _ in range(concurrency)))
+
+    print(f"{concurrency:>5} in flight  {len(latencies) / seconds:7.2f} q/s  errors {errors:>4}  "
+          f"p50 {percentile(latencies, 0.5):6.2f}s p95 {percentile(latencies, 0.95):6.2f}s  "
+          f"crud probe median {statistics.median(probes) * 1000 if probes else float('nan'):8.1f}ms max {max(probes, default=float('nan')) * 1000:8.1f}ms")
+
+if __name__ == "__main__":
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8000"
+    for level in [int(arg) for arg in sys.argv[2:]] or [1, 8, 32, 128]:
+        asyncio.run(measure(base_url, level))
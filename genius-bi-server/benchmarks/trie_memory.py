@@ -0,0 +1,63 @@
+"""
+Memory footprint of the alias lexicon for 10k, 100k and 1M synthetic aliases.
+
+Run from genius-bi-server:  python -m benchmarks.trie_memory [sizes...]
+Reports the traced heap of an in-memory SentenceTrie and the size of the
+equivalent memory-mapped snapshot file.
+"""
+import gc
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.models.nature import Nature, NatureKind
+from src.utils.lexicon_snapshot import CompiledTrie, write_snapshot
+from src.utils.spacy_util import SentenceTrie
+
+def synthetic_aliases(count: int, seed: int = 7) -> list:
+    """Distinct aliases of 1-4 words drawn from a Zipf-like vocabulary, like real metric and dimension names"""
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(max(1000, count // 10))]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    seen = set()
+    aliases = []
+    while len(aliases) < count:
+        sentence = " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(1, 4)))
+        if sentence in seen:
+            continue
+        seen.add(sentence)
+        kind = NatureKind.DIMENSION if len(aliases) % 2 else NatureKind.METRIC
+        aliases.append((sentence, Nature.of(kind, len(aliases) // 50, len(aliases))))
+    return aliases
+
+def measure(count: int) -> None:
+    aliases = synthetic_aliases(count)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    trie = SentenceTrie()
+    for sentence, nature in aliases:
+        trie.insert(sentence, nature)
+    trie.compile()
+    build_seconds = time.perf_counter() - start
+    heap, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "lexicon.bin")
+        write_snapshot(trie, path, "benchmark")
+        file_size = os.path.getsize(path)
+        start = time.perf_counter()
+        CompiledTrie(path)
+        open_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{count:>9} aliases  trie heap {heap / 2**20:8.1f} MiB ({heap / count:6.0f} B/alias)  "
+          f"build {build_seconds:6.2f}s  snapshot {file_size / 2**20:7.1f} MiB  open {open_ms:.2f}ms")
+
+if __name__ == "__main__":
+    for size in [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]:
+        measure(size)
@@ -0,0 +1,74 @@
+"""
+Typo lookup latency: SymSpell TypoIndex against a brute force difflib scan.
+
+Run from genius-bi-server:  python -m benchmarks.typo_lookup [sizes...]
+Misspells vocabulary words with one or two random edits (insert, delete,
+substitute, swap) and reports per-query latency, how often the original word
+comes back first, and the traced heap of the index.
+"""
+import difflib
+import gc
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+from src.utils.typo_index import TypoIndex, allowed_distance
+
+def synthetic_vocabulary(count: int, seed: int = 11) -> dict:
+    """Distinct lowercase words of 4-12 letters, with Zipf-like usage counts"""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12))))
+    return {word: count // (rank + 1) + 1 for rank, word in enumerate(sorted(words))}
+
+def misspell(word: str, rng: random.Random) -> str:
+    for _ in range(allowed_distance(len(word))):
+        i = rng.randrange(len(word) - 1)
+        edit = rng.choice("idsx")
+        if edit == "i":
+            word = word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+        elif edit == "d":
+            word = word[:i] + word[i + 1:]
+        elif edit == "s":
+            word = word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+        else:
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word
+
+def measure(count: int, queries: int = 200) -> None:
+    vocabulary = synthetic_vocabulary(count)
+    rng = random.Random(3)
+    samples = [(word, misspell(word, rng)) for word in rng.sample(sorted(vocabulary), queries)]
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = TypoIndex(vocabulary)
+    build_seconds = time.perf_counter() - start
+    heap, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    hits = 0
+    for word, typo in samples:
+        candidates = index.lookup(typo)
+        hits += bool(candidates) and candidates[0][0] == word
+    index_us = (time.perf_counter() - start) / queries * 1e6
+
+    words = list(vocabulary)
+    brute_samples = samples[:20]
+    start = time.perf_counter()
+    brute_hits = 0
+    for word, typo in brute_samples:
+        brute_hits += difflib.get_close_matches(typo, words, n=1, cutoff=0.7) == [word]
+    brute_us = (time.perf_counter() - start) / len(brute_samples) * 1e6
+
+    print(f"{count:>9} words  index {len(index):>9} deletes {heap / 2**20:7.1f} MiB build {build_seconds:6.2f}s  "
+          f"lookup {index_us:8.1f}us top-1 {hits / queries:4.0%}  difflib scan {brute_us / 1000:9.1f}ms top-1 {brute_hits / len(brute_samples):4.0%}")
+
+if __name__ == "__main__":
+    for size in [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]:
+        measure(size)
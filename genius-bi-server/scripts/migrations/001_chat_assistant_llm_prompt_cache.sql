@@ -0,0 +1,13 @@
+-- Brings a database created from an earlier schema.sql up to date with it:
+-- chat assistants choose their LLM and may opt out of cached answers,
+-- and the dimension and metric types the pipeline relies on are documented.
+
+ALTER TABLE `chat_assistant_tbl`
+  ADD COLUMN `llm_id` BIGINT UNSIGNED DEFAULT NULL comment 'llm id, default llm when null' AFTER `analysis_assistant_id`,
+  ADD COLUMN `prompt_cache` tinyint NOT NULL DEFAULT 1 comment 'serve cached llm answers, question plans and reused examples, 0 to opt out' AFTER `llm_id`;
+
+ALTER TABLE `model_dimension_tbl`
+  MODIFY COLUMN `dimension_type` varchar(50) comment 'dimension type, foreign key or partition time for the column the table is partitioned on';
+
+ALTER TABLE `model_metric_tbl`
+  MODIFY COLUMN `metric_type` varchar(50) comment 'metric type, atom for a column summed or averaged as is or derived for one computed by its express';
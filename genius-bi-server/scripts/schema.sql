@@ -63,7 +63,7 @@ CREATE TABLE `model_dimension_tbl` (
   `model_id` BIGINT UNSIGNED NOT NULL comment 'model id',
   `name` varchar(50) NOT NULL comment 'name',
   `alias` varchar(50) comment 'alias',
-  `dimension_type` varchar(50) comment 'dimension type',
+  `dimension_type` varchar(50) comment 'dimension type, foreign key or partition time for the column the table is partitioned on',
   `description` varchar(50) comment 'description',
   `express` varchar(255) comment 'express',
   `create_by` varchar(50) DEFAULT NULL comment 'create user',
@@ -78,7 +78,7 @@ CREATE TABLE `model_metric_tbl` (
   `model_id` BIGINT UNSIGNED NOT NULL comment 'model id',
   `name` varchar(50) NOT NULL comment 'name',
   `alias` varchar(50) comment 'alias',
-  `metric_type` varchar(50) comment 'metric type',
+  `metric_type` varchar(50) comment 'metric type, atom for a column summed or averaged as is or derived for one computed by its express',
   `description` varchar(255) comment 'description',
   `express` varchar(255) comment 'express',
   `create_by` varchar(50) DEFAULT NULL comment 'create user',
@@ -149,6 +149,8 @@ CREATE TABLE `chat_assistant_tbl` (
   `chat_name` varchar(50) NOT NULL comment 'chat name',
   `chat_description` varchar(50) NOT NULL comment 'chat description',
   `analysis_assistant_id` BIGINT UNSIGNED  NOT NULL comment 'dimension id',
+  `llm_id` BIGINT UNSIGNED DEFAULT NULL comment 'llm id, default llm when null',
+  `prompt_cache` tinyint NOT NULL DEFAULT 1 comment 'serve cached llm answers, question plans and reused examples, 0 to opt out',
   `create_by` varchar(50) DEFAULT NULL comment 'create user',
   `create_time` TIMESTAMP DEFAULT CURRENT_TIMESTAMP comment 'create time',
   `update_by` varchar(50) DEFAULT NULL comment 'update user',
@@ -8,10 +8,15 @@ class ChatQueryParsingState(TypedDict):
     chat_id: str
     dataset_id: str
     dataset_name: str
+    llm_id: Optional[int] # llm_tbl row of the chat assistant, None for the default LLM
+    prompt_cache: bool # whether LLM answers may come from, and go to, the prompt cache
 
     # processing state
+    plan_info: Dict[str, Any]  # plan cache node output
     mapping_info: Dict[str, Any]  # map node output
+    partition_info: Dict[str, Any]  # map node output: partition time field alias → Nature of the mapped models
     parsing_info: Dict[str, Any]  # parse node output
+    validation_info: Dict[str, Any]  # validation node output
     correction_info: Dict[str, Any]  # correction node output
     transition_info: Dict[str, Any]  # transition node output
 
@@ -0,0 +1,25 @@
+from src.langgraph.text2insight.chat_query_parsing_state import ChatQueryParsingState
+from src.utils.plan_cache import plan_cache
+async def execute_plan_lookup(state: ChatQueryParsingState) -> ChatQueryParsingState:
+    dataset_id = state['dataset_id']
+    # Taken before planning, so transition only caches a plan no metadata change overtook
+    generation = plan_cache.generation(dataset_id)
+    version = await plan_cache.version(dataset_id)
+    state['plan_info'] = {}
+    state['plan_info']['version'] = version
+    state['plan_info']['generation'] = generation
+    sql = plan_cache.get(dataset_id, state['query'], version) if state.get('prompt_cache', True) else None
+    state['plan_info']['hit'] = sql is not None
+    if sql is None:
+        return {
+            **state,
+            "current_phase": "mapping"
+        }
+
+    # Same question on unchanged metadata, skip straight to execution with the SQL planned last time
+    state['transition_info'] = {}
+    state['transition_info']['sql'] = sql
+    return {
+            **state,
+            "current_phase": "execution"
+        }
@@ -1,27 +1,39 @@
 from src.langgraph.text2insight.chat_query_parsing_state import ChatQueryParsingState
 from src.utils.spacy_util import spacy_util
-def execute_semantic_mapping(state: ChatQueryParsingState) -> ChatQueryParsingState:
-    matched_elements =  spacy_util.prefix_match_words(state['query'])
-    from src.dataprovider.mysql.mysql_db import execute_sql_ext
-    sql = '''
-    select concat('_',dimension_id ,'_', 'dimension') as nature_suffix from dataset_dimension_tbl where dataset_id  = :dataset_id
-    union
-    select concat('_',metric_id ,'_', 'metric') as nature_suffix from dataset_metric_tbl where dataset_id  = :dataset_id
-    '''
-    results = execute_sql_ext(sql, {"dataset_id": state['dataset_id']})
-    swapped_dict = {item['nature_suffix']: 'nature_suffix' for item in results}
+from src.utils.semantic_catalog import semantic_catalog
+import asyncio
+async def execute_semantic_mapping(state: ChatQueryParsingState) -> ChatQueryParsingState:
+    # Only aliases of the dataset's own dimensions and metrics are matched, as the catalog lists them at the
+    # version plan lookup read; it and the lexicon stamp are read asynchronously, matching reads no table
+    plan_info = state.get('plan_info')
+    catalog = await semantic_catalog.get(state['dataset_id'], plan_info['version'] if plan_info else None)
+    fields = catalog.datasets.get(str(state['dataset_id']), frozenset())
+    version = catalog.stamps.get(str(state['dataset_id']))
+    await spacy_util.check_lexicon()
+    # Off the event loop: matching is CPU work, a dataset's first question builds its trie
+    matched_elements = await asyncio.to_thread(spacy_util.prefix_match_words, state['query'], state['dataset_id'], min_score=0.9,
+                                               fields_version=version, fields=fields)
     mapping_info = {}
-    for element in matched_elements:
-        s = element[1]
-        first_index = s.find('_') + 1  # Position after the first underscore
-        second_index = s.find('_', first_index)  # Find second underscore starting from after the first one
-        result = s[second_index:] if second_index != -1 else s
-        if result in swapped_dict:
-            if element[2] >= 0.9:
-                mapping_info[element[0]] = element[1]
+    for phrase, nature, score in matched_elements:
+        mapping_info[phrase] = nature
+    # Synonyms no alias lists ("revenue" for "total tpv"), only when a word vectors model is configured
+    mapped = set(mapping_info.values())
+    semantic_elements = await asyncio.to_thread(spacy_util.semantic_match_words, state['query'], state['dataset_id'], min_score=0.8,
+                                                fields_version=version, fields=fields)
+    for phrase, nature, score in semantic_elements:
+        if nature not in mapped:
+            mapping_info[phrase] = nature
+            mapped.add(nature)
     state['mapping_info'] = mapping_info
-    
+
+    # Partition columns of the models the question touches, time ranges should be expressed on them
+    models = {nature.model_id for nature in mapping_info.values() if not nature.is_term}
+    partition_info = {}
+    if models:
+        partition_info = catalog.partition_fields(state['dataset_id'], models)
+    state['partition_info'] = partition_info
+
     return {
             **state,
-            "current_phase": "parsing"
-        }
\ No newline at end of file
+            "current_phase": "template"
+        }
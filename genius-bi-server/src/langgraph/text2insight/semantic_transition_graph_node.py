@@ -1,61 +1,58 @@
 
 from src.langgraph.text2insight.chat_query_parsing_state import ChatQueryParsingState
-from src.dataprovider.mysql.mysql_db import execute_sql_ext
-def execute_semantic_transition(state: ChatQueryParsingState) -> ChatQueryParsingState:
+from src.utils.plan_cache import plan_cache
+from src.utils.semantic_catalog import semantic_catalog
+from src.utils.sql_rewrite import add_partition_filter, parse_sql, remember, resolve_aliases
+from src.utils.sql_validator import is_time_alias
+from src.utils.time_range import parse_time_ranges
+from src import settings
+from datetime import date, timedelta
+async def execute_semantic_transition(state: ChatQueryParsingState) -> ChatQueryParsingState:
     mapping_info = state['mapping_info']
-    dimension_model_ids = []
-    dimension_ids = []
-    metric_ids = []
-    for k, v in mapping_info.items():
-        arr = str(v).split('_')
-        if str(v).endswith('_dimension'):
-            dimension_model_ids.append(arr[1])
-            dimension_ids.append(arr[2])
-        else:
-            metric_ids.append(arr[2])
-    metric_sql = f'''
-    select t2.table_name  as table_name,t1.alias,t1.name as field_name,t1.metric_type,t1.express
-    from model_metric_tbl t1
-    join model_tbl t2
-    on t1.model_id  = t2.id
-    where t1.id in ({",".join([f"'{x}'" for x in metric_ids])})
-    '''
-    metrics = execute_sql_ext(metric_sql, None)
+    partition_info = state.get('partition_info') or {}
+    plan_info = state.get('plan_info')
+    version = plan_info['version'] if plan_info else await plan_cache.version(state['dataset_id'])
+    # Fields, tables and joins come from the in-memory catalog, no metadata queries per question
+    catalog = await semantic_catalog.get(state['dataset_id'], version)
+    fields = [field for field in map(catalog.field, dict.fromkeys([*mapping_info.values(), *partition_info.values()])) if field is not None]
+    join_graph = catalog.join_graph(state['dataset_id'])
 
-    dimension_sql = f'''
-    select t2.table_name  as table_name,t1.alias,t1.name as field_name,t1.dimension_type ,t1.express
-    from model_dimension_tbl t1
-    join model_tbl t2
-    on t1.model_id  = t2.id
-    where t1.id in ({",".join([f"'{x}'" for x in dimension_ids])})
-    '''
-    dimensions = execute_sql_ext(dimension_sql, None)
+    # Parsed once, shared with validation; a copy is rewritten
+    tree = parse_sql(state['correction_info']['sql'])
+    if tree is None:
+        raise ValueError(f"Expected one SQL statement: {state['correction_info']['sql']}")
+    # Partitioned fact tables are read over the question's time range, a default window when it states none
+    partition_window = False
+    if settings.PARTITION_WINDOW_DAYS > 0 and partition_info:
+        start = (date.today() - timedelta(days=settings.PARTITION_WINDOW_DAYS)).strftime("%Y-%m-%d 00:00:00")
+        time_fields = {alias for alias, nature in mapping_info.items() if nature.is_dimension and is_time_alias(alias)}
+        ranges = parse_time_ranges(state['query'])
+        for alias in partition_info:
+            partition_window = add_partition_filter(tree, state['dataset_name'], alias, time_fields, ranges, start) or partition_window
 
-    model_id_sql = f'''
-    select t2.table_name as table_name,t1.name as field_name,t1.express
-    from model_dimension_tbl t1
-    join model_tbl t2
-    on t1.model_id  = t2.id
-    where t1.dimension_type = 'foreign key' and t1.model_id in ({",".join([f"'{x}'" for x in dimension_model_ids])})
-    '''
-    model_relations = execute_sql_ext(model_id_sql, None)    
-
-    sql = state['correction_info']['sql']
-    for item in metrics:
-        sql = sql.replace('`'+item['alias']+'`', item['table_name'] + '.' + item['field_name'])
-    for item in dimensions:
-        sql = sql.replace('`'+item['alias']+'`', item['table_name'] + '.' + item['field_name'])
-    
-    dataset_replace_sql = ''
-    for item in model_relations:
-        if dataset_replace_sql == '':
-            dataset_replace_sql = item['table_name'] + ' '
-        if item['express'] != '':
-            dataset_replace_sql = dataset_replace_sql + ' left join ' + item['express'].split('.')[0] + ' on ' + f'''{item['table_name']}.{item['field_name']} = {item['express']}'''
-    sql = sql.replace(state['dataset_name'], dataset_replace_sql)
+    columns = {field.alias: (field.table_name, field.name) for field in fields}
+    metric_tables = {field.table_name for field in fields if field.nature.is_metric}
+    def plan_joins(tables):
+        # The fact table of the metrics is read first, count(*) and the like read the table of any mapped field
+        tables = sorted(tables, key=lambda table: table not in metric_tables) or [table for table, field in columns.values()][:1]
+        if not tables:
+            return state['dataset_name'], []
+        root, joins = join_graph.plan(tables)
+        unreachable = set(tables) - {root} - {table for table, condition in joins}
+        if unreachable:
+            raise ValueError(f"No foreign key dimension joins {', '.join(sorted(unreachable))} to {root}")
+        return root, joins
+    # Alias columns become table.field and the dataset only joins the tables they need
+    resolve_aliases(tree, state['dataset_name'], columns, plan_joins)
+    sql = tree.sql(dialect="mysql")
+    remember(sql, (tree,))
 
     state['transition_info'] = {}
     state['transition_info']['sql'] = sql
+    state['transition_info']['partition_window'] = partition_window
+
+    if plan_info and state.get('prompt_cache', True):
+        plan_cache.put(state['dataset_id'], state['query'], plan_info['version'], plan_info['generation'], sql, partition_window)
 
     return {
         **state,
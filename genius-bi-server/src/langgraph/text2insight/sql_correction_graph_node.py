@@ -2,10 +2,8 @@
 from src.langgraph.text2insight.chat_query_parsing_state import ChatQueryParsingState
 from datetime import datetime
 from string import Template
-from langchain.prompts import PromptTemplate
-from langchain_community.llms import Tongyi
-import os
-from langchain_core.output_parsers import StrOutputParser
+from langgraph.config import get_stream_writer
+from src.llm.llm_registry import llm_registry
 
 sql_correction_prompt_template = '''
 #Role: You are a senior data engineer experienced in writing SQL languages.
@@ -24,17 +22,17 @@ Schema: {schema}
 ExtraInfo:CurrentDate=[{current_date}]
 SQL: {sql}
 '''
-def execute_sql_correction(state: ChatQueryParsingState) -> ChatQueryParsingState:
+async def execute_sql_correction(state: ChatQueryParsingState) -> ChatQueryParsingState:
     examples = ''
     query = state["query"]
     schema_template = Template('Table=[$table_name],PartitionTimeField=[$partitionTimeField],Metrics=[$metrics],Dimensions=[$dimensions]')
     table_name = state["dataset_name"]
-    partitionTimeField = ''
+    partitionTimeField = ','.join(state.get("partition_info") or {})
     metrics = ''
     dimensions = ''
     mapping_info = state["mapping_info"]
     for field_alias, field_nature in mapping_info.items():
-        if field_nature.endswith('_dimension'):
+        if field_nature.is_dimension:
             if field_alias.endswith('time'):
                 dimensions = dimensions + ',' + field_alias + ' Format yyyy-MM-dd 00:00:00'
             else:
@@ -45,16 +43,16 @@ def execute_sql_correction(state: ChatQueryParsingState) -> ChatQueryParsingStat
     dimensions = dimensions[1:]
     current_date = datetime.now().strftime("%Y-%m-%d")
     schema = schema_template.substitute(table_name=table_name, partitionTimeField=partitionTimeField, metrics=metrics, dimensions=dimensions)
-    prompt_template = PromptTemplate(
-            input_variables=["query","schema","current_date","sql"],
-            template=sql_correction_prompt_template
-        )
-    llm = Tongyi(model_name="deepseek-r1", dashscope_api_key=os.environ["DASHSCOPE_API_KEY"], stream=True, verbose=True)
-    chain = prompt_template | llm | StrOutputParser()
+    # Long-lived client of the chat assistant's LLM, its chains are built once per process
+    llm_client = await llm_registry.get(state.get("llm_id"))
     examples = '''
     Query:show me the total tpv in 2024 of transaction time,Schema:Table=[transaction],PartitionTimeField=[],Metrics=[total tpv],Dimensions=[transaction time Format yyyy-MM-dd 00:00:00],ExtraInfo:CurrentDate=[2025-06-05],SQL:select sum({total tpv}) from transaction where {transaction time} >= '2024-01-01 00:00:00' AND {transaction time} <= '2024-12-31 23:59:59'
     '''
-    sql = chain.invoke({"query":query, "schema":schema, "current_date":current_date,"sql":state["parsing_info"]["sql"]})
+    # SQL goes to the graph's custom stream as it arrives (a no-op unless the caller streams);
+    # reasoning and markdown are dropped, and a prompt answered before comes from the cache
+    writer = get_stream_writer()
+    sql = await llm_client.sql("sql_correction", sql_correction_prompt_template, {"query":query, "schema":schema, "current_date":current_date,"sql":state["parsing_info"]["sql"]},
+                               lambda text: writer({"phase": "correction", "text": text}), state.get("prompt_cache", True))
     state["correction_info"] = {}
     state["correction_info"]['sql'] = sql
     print(sql)
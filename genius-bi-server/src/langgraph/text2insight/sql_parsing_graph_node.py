@@ -1,10 +1,11 @@
 from src.langgraph.text2insight.chat_query_parsing_state import ChatQueryParsingState
 from datetime import datetime
 from string import Template
-from langchain.prompts import PromptTemplate
-from langchain_community.llms import Tongyi
-import os
-from langchain_core.output_parsers import StrOutputParser
+from langgraph.config import get_stream_writer
+from src.llm.llm_registry import llm_registry
+from src.utils.example_store import example_store
+from src import settings
+import asyncio
 
 sql_parsing_prompt_template = '''
 #Role: You are a data engineer experienced in writing SQL languages.
@@ -24,17 +25,17 @@ sql_parsing_prompt_template = '''
 Schema: {schema}
 ExtraInfo:CurrentDate=[{current_date}]
 '''
-def execute_sql_parsing(state: ChatQueryParsingState) -> ChatQueryParsingState:
+async def execute_sql_parsing(state: ChatQueryParsingState) -> ChatQueryParsingState:
     examples = ''
     query = state["query"]
     schema_template = Template('Table=[$table_name],PartitionTimeField=[$partitionTimeField],Metrics=[$metrics],Dimensions=[$dimensions]')
     table_name = state["dataset_name"]
-    partitionTimeField = ''
+    partitionTimeField = ','.join(state.get("partition_info") or {})
     metrics = ''
     dimensions = ''
     mapping_info = state["mapping_info"]
     for field_alias, field_nature in mapping_info.items():
-        if field_nature.endswith('_dimension'):
+        if field_nature.is_dimension:
             if field_alias.endswith('time'):
                 dimensions = dimensions + ',' + field_alias + ' Format yyyy-MM-dd 00:00:00'
             else:
@@ -45,21 +46,41 @@ def execute_sql_parsing(state: ChatQueryParsingState) -> ChatQueryParsingState:
     dimensions = dimensions[1:]
     current_date = datetime.now().strftime("%Y-%m-%d")
     schema = schema_template.substitute(table_name=table_name, partitionTimeField=partitionTimeField, metrics=metrics, dimensions=dimensions)
-    prompt_template = PromptTemplate(
-            input_variables=["examples","query","schema","current_date"],
-            template=sql_parsing_prompt_template
-        )
-    llm = Tongyi(model_name="deepseek-r1", dashscope_api_key=os.environ["DASHSCOPE_API_KEY"], stream=True, verbose=True)
-    chain = prompt_template | llm | StrOutputParser()
-    examples = '''
+    # The dataset's validated questions most similar to this one; off the event loop, its first lookup loads them from disk
+    found = await asyncio.to_thread(example_store.search, state["dataset_id"], query, settings.EXAMPLE_TOP_K)
+    if found:
+        examples = ''.join(f'''
+    {example.prompt_line()}''' for score, example in found) + '''
+    '''
+    else:
+        examples = '''
     Query:show me the total tpv in 2024 of transaction time,Schema:Table=[transaction],PartitionTimeField=[],Metrics=[total tpv],Dimensions=[transaction time Format yyyy-MM-dd 00:00:00],ExtraInfo:CurrentDate=[2025-06-05],SQL:select sum(`total tpv`) from transaction where `transaction time` >= '2024-01-01 00:00:00' AND `transaction time` <= '2024-12-31 23:59:59'
     '''
-    sql = chain.invoke({"examples": examples, "query":query, "schema":schema, "current_date":current_date})
+    # A near duplicate of a validated question reuses its SQL, validation still checks it against this mapping
+    reused = example_store.reusable(query, found, settings.EXAMPLE_REUSE_SCORE) if state.get("prompt_cache", True) else None
+    sql = reused
+    cache_key = None
+    if sql is None:
+        # Long-lived client of the chat assistant's LLM, its chains are built once per process
+        llm_client = await llm_registry.get(state.get("llm_id"))
+        # SQL goes to the graph's custom stream as it arrives (a no-op unless the caller streams);
+        # reasoning and markdown are dropped, and a prompt answered before comes from the cache
+        writer = get_stream_writer()
+        inputs = {"examples": examples, "query":query, "schema":schema, "current_date":current_date}
+        sql = await llm_client.sql("sql_parsing", sql_parsing_prompt_template, inputs,
+                                   lambda text: writer({"phase": "parsing", "text": text}), state.get("prompt_cache", True))
+        # Validation drops the cached answer again if it rejects it, so it is not replayed
+        if state.get("prompt_cache", True):
+            cache_key = llm_client.cache_key("sql_parsing", sql_parsing_prompt_template, inputs)
     state["parsing_info"] = {}
     state["parsing_info"]['sql'] = sql
+    state["parsing_info"]['schema'] = schema
+    state["parsing_info"]['current_date'] = current_date
+    state["parsing_info"]['example_reused'] = reused is not None
+    state["parsing_info"]['cache_key'] = cache_key
     print(sql)
 
     return {
             **state,
-            "current_phase": "correction"
+            "current_phase": "validation"
         }
\ No newline at end of file
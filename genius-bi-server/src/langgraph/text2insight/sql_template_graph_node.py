@@ -0,0 +1,27 @@
+from src.langgraph.text2insight.chat_query_parsing_state import ChatQueryParsingState
+from src.utils.semantic_catalog import semantic_catalog
+from src.utils.sql_template import sql_templates
+from src.utils.sql_validator import validate_sql
+async def execute_sql_template(state: ChatQueryParsingState) -> ChatQueryParsingState:
+    partition_info = state.get('partition_info')
+    plan_info = state.get('plan_info')
+    # How each mapped metric aggregates, the template only writes the ones summed or averaged as is
+    catalog = await semantic_catalog.get(state['dataset_id'], plan_info['version'] if plan_info else None)
+    metric_types = {alias: field.field_type for alias, nature in state['mapping_info'].items() if nature.is_metric
+                    for field in [catalog.field(nature)] if field is not None}
+    sql = sql_templates.generate(state['query'], state['dataset_name'], state['mapping_info'], metric_types, partition_info)
+    if sql is None or validate_sql(sql, state['query'], state['dataset_name'], state['mapping_info'], partition_info):
+        return {
+            **state,
+            "current_phase": "parsing"
+        }
+
+    # Fully determined by the mapping and the stated time range, neither LLM is needed
+    state['parsing_info'] = {}
+    state['parsing_info']['sql'] = sql
+    state['correction_info'] = {}
+    state['correction_info']['sql'] = sql
+    return {
+            **state,
+            "current_phase": "transition"
+        }
@@ -0,0 +1,31 @@
+from src.langgraph.text2insight.chat_query_parsing_state import ChatQueryParsingState
+from src.utils.sql_validator import validate_sql
+from src.utils.example_store import example_store
+from src.llm.prompt_cache import prompt_cache
+import asyncio
+async def execute_sql_validation(state: ChatQueryParsingState) -> ChatQueryParsingState:
+    sql = state['parsing_info']['sql']
+    problems = validate_sql(sql, state['query'], state['dataset_name'], state['mapping_info'], state.get('partition_info'))
+    state['validation_info'] = {}
+    state['validation_info']['problems'] = problems
+    if problems:
+        if state['parsing_info'].get('cache_key'):
+            # The parsing LLM's answer was cached as it arrived, a rejected one must not be served again
+            await asyncio.to_thread(prompt_cache.delete, state['parsing_info']['cache_key'])
+        return {
+            **state,
+            "current_phase": "correction"
+        }
+
+    parsing_info = state['parsing_info']
+    if 'schema' in parsing_info and not parsing_info.get('example_reused'):
+        # A future few-shot example, or the answer to a near duplicate question; written to SQLite off the event loop
+        await asyncio.to_thread(example_store.add, state['dataset_id'], state['query'], sql, parsing_info['schema'], parsing_info['current_date'])
+
+    # Valid SQL skips the correction LLM, as if correction had returned it unchanged
+    state['correction_info'] = {}
+    state['correction_info']['sql'] = sql
+    return {
+            **state,
+            "current_phase": "transition"
+        }
@@ -1,28 +1,44 @@
 from langgraph.graph import StateGraph, END, START
 from src.langgraph.text2insight.chat_query_parsing_state import ChatQueryParsingState
+from src.langgraph.text2insight.plan_cache_graph_node import execute_plan_lookup
 from src.langgraph.text2insight.semantic_mapping_graph_node import execute_semantic_mapping
+from src.langgraph.text2insight.sql_template_graph_node import execute_sql_template
 from src.langgraph.text2insight.sql_parsing_graph_node import execute_sql_parsing
+from src.langgraph.text2insight.sql_validation_graph_node import execute_sql_validation
 from src.langgraph.text2insight.sql_correction_graph_node import execute_sql_correction
 from src.langgraph.text2insight.semantic_transition_graph_node import execute_semantic_transition
 from src.langgraph.text2insight.sql_execution_graph_node import execute_sql
 from src.langgraph.text2insight.result_analysis_graph_node import execute_result_analysis
 
+def route_by_phase(state: ChatQueryParsingState) -> str:
+    """Next node as chosen by the node that just ran: its current_phase"""
+    return state['current_phase']
+
 class Text2InsightGraph:
     def build_chat_query_parsing_graph(self) -> StateGraph:
         """create query parsing in chat scene"""
 
         workflow = StateGraph(ChatQueryParsingState)
+        workflow.add_node('plan_cache', execute_plan_lookup)
         workflow.add_node('mapping', execute_semantic_mapping)
+        workflow.add_node('template', execute_sql_template)
         workflow.add_node('parsing', execute_sql_parsing)
+        workflow.add_node('validation', execute_sql_validation)
         workflow.add_node('correction', execute_sql_correction)
         workflow.add_node('transition', execute_semantic_transition)
         workflow.add_node('execution', execute_sql)
         workflow.add_node('result_analysis', execute_result_analysis)
 
-        workflow.set_entry_point("mapping")
+        workflow.set_entry_point("plan_cache")
 
-        workflow.add_edge('mapping', 'parsing')
-        workflow.add_edge('parsing', 'correction')
+        # A cached plan goes straight to execution, anything else is planned from the mapping on
+        workflow.add_conditional_edges('plan_cache', route_by_phase, {'mapping': 'mapping', 'execution': 'execution'})
+        workflow.add_edge('mapping', 'template')
+        # Simple metric by dimension questions are written from the mapping, the rest by the LLM
+        workflow.add_conditional_edges('template', route_by_phase, {'parsing': 'parsing', 'transition': 'transition'})
+        workflow.add_edge('parsing', 'validation')
+        # The correction LLM only runs for SQL that failed the local checks
+        workflow.add_conditional_edges('validation', route_by_phase, {'correction': 'correction', 'transition': 'transition'})
         workflow.add_edge('correction', 'transition')
         workflow.add_edge('transition', 'execution')
         workflow.add_edge('execution', 'result_analysis')
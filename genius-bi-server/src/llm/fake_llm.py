@@ -0,0 +1,102 @@
+"""
+Offline stand-in for the SQL generating LLM, for load tests and profiling.
+
+Answers the sql_parsing prompt with SQL built from its schema line (or a canned
+answer per question) and the sql_correction prompt with the SQL it was given,
+while simulating time to first token, a token rate and random failures.
+"""
+import asyncio
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from pydantic import PrivateAttr
+
+QUERY_PATTERN = re.compile(r"^#Query: (.*)$", re.MULTILINE)
+SCHEMA_PATTERN = re.compile(r"^Schema: Table=\[(.*?)\],PartitionTimeField=\[(.*?)\],Metrics=\[(.*?)\],Dimensions=\[(.*?)\]", re.MULTILINE)
+SQL_PATTERN = re.compile(r"^SQL: (.*)", re.MULTILINE | re.DOTALL)
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+def fake_sql(prompt: str, canned: dict) -> str:
+    """SQL answer to a sql_parsing or sql_correction prompt"""
+    given = SQL_PATTERN.search(prompt)
+    if given:
+        # Correction: the SQL is already right
+        return given.group(1).strip()
+    query = QUERY_PATTERN.search(prompt)
+    query = query.group(1).strip() if query else ""
+    if query in canned:
+        return canned[query]
+    schema = SCHEMA_PATTERN.search(prompt)
+    if schema is None:
+        return "select 1"
+    table, partition_time_field, metrics, dimensions = schema.groups()
+    metrics = [metric for metric in metrics.split(",") if metric]
+    time_fields, group_fields = [], []
+    for dimension in (dimension for dimension in dimensions.split(",") if dimension):
+        if " Format " in dimension:
+            time_fields.append(dimension.split(" Format ")[0])
+        else:
+            group_fields.append(dimension)
+    columns = [f"`{field}`" for field in group_fields] + [f"sum(`{metric}`)" for metric in metrics]
+    sql = f"select {', '.join(columns) or 'count(*)'} from {table}"
+    year = YEAR_PATTERN.search(query)
+    time_field = time_fields[0] if time_fields else partition_time_field
+    if year and time_field:
+        sql += f" where `{time_field}` >= '{year.group(0)}-01-01 00:00:00' AND `{time_field}` <= '{year.group(0)}-12-31 23:59:59'"
+    if group_fields and metrics:
+        sql += " group by " + ", ".join(f"`{field}`" for field in group_fields)
+    return sql
+
+class FakeSQLLLM(LLM):
+    """Deterministic SQL answers with injected latency, token rate and error rate"""
+    ttft: float = 0.5                 # Seconds before the first token
+    tokens_per_second: float = 50.0   # Rate of the following tokens, 0 sends them all at once
+    error_rate: float = 0.0           # Fraction of calls that raise
+    seed: int = 0
+    canned: Dict[str, str] = {}       # Question → SQL returned for it
+    _random: random.Random = PrivateAttr()
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._random = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-sql"
+
+    def _tokens(self, prompt: str) -> List[str]:
+        if self._random.random() < self.error_rate:
+            raise RuntimeError("Injected fake LLM error")
+        return TOKEN_PATTERN.findall(fake_sql(prompt, self.canned))
+
+    def _delay(self, index: int) -> float:
+        if index == 0:
+            return self.ttft
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        return "".join([chunk.text async for chunk in self._astream(prompt, stop, run_manager, **kwargs)])
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        for index, token in enumerate(self._tokens(prompt)):
+            time.sleep(self._delay(index))
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[GenerationChunk]:
+        for index, token in enumerate(self._tokens(prompt)):
+            await asyncio.sleep(self._delay(index))
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
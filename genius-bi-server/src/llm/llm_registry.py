@@ -0,0 +1,126 @@
+"""
+Process-wide LLM clients, configured by llm_tbl.
+
+Each client is created once per llm_tbl row and reused by every question, so
+its HTTP connections stay open between calls; prompt chains built on it are
+cached too, and so are its answers (see prompt_cache). The /llms/ router
+refreshes the registry whenever a row changes.
+"""
+import asyncio
+import os
+import threading
+
+from langchain.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from src import settings
+from src.dataprovider.mysql.mysql_db import execute_sql_ext_async
+from src.llm.prompt_cache import prompt_cache
+from src.llm.sql_extractor import astream_sql
+from src.utils.concurrency import llm_semaphore
+
+LLM_SQL = '''
+          select id, connection_name, api_protocal, base_url, api_key, model_name, api_version, temperature, timeout
+          from llm_tbl
+          '''
+
+# Used by chat assistants without an llm_id
+DEFAULT_LLM = {"id": None, "connection_name": "default", "api_protocal": "tongyi", "base_url": None, "api_key": None,
+               "model_name": "deepseek-r1", "api_version": None, "temperature": None, "timeout": None}
+
+def create_llm(row: dict):
+    """LangChain model for an llm_tbl row, by its api_protocal"""
+    protocal = (row["api_protocal"] or "").lower()
+    if protocal == "fake" or settings.FAKE_LLM:
+        from src.llm.fake_llm import FakeSQLLLM
+        return FakeSQLLLM(ttft=settings.FAKE_LLM_TTFT, tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+                          error_rate=settings.FAKE_LLM_ERROR_RATE)
+    if protocal in ("tongyi", "dashscope"):
+        from langchain_community.llms import Tongyi
+        model_kwargs = {"temperature": row["temperature"]} if row["temperature"] is not None else {}
+        return Tongyi(model_name=row["model_name"] or DEFAULT_LLM["model_name"],
+                      dashscope_api_key=row["api_key"] or os.environ["DASHSCOPE_API_KEY"],
+                      model_kwargs=model_kwargs, stream=True, verbose=True)
+    if protocal == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=row["model_name"], base_url=row["base_url"], api_key=row["api_key"],
+                          temperature=row["temperature"], timeout=row["timeout"], streaming=True)
+    raise ValueError(f"Unsupported api protocal {row['api_protocal']} of LLM {row['connection_name']}")
+
+class LLMClient:
+    """One long-lived model and the prompt chains built on it"""
+    def __init__(self, row: dict) -> None:
+        self.row = row
+        self.llm = create_llm(row)
+        # Answers are cached per model and sampling settings, so an edited llm_tbl row never serves answers
+        # another model, or the same one at another temperature, gave
+        self.model = f"{row['api_protocal']}|{row['base_url']}|{row['model_name']}|{row['api_version']}|{row['temperature']}"
+        self._chains = {}  # name → (prompt, prompt | llm | str parser)
+    def chain(self, name: str, template: str):
+        """prompt | llm | str parser for template, built once per name"""
+        return self._prompt_chain(name, template)[1]
+    def _prompt_chain(self, name: str, template: str) -> tuple:
+        entry = self._chains.get(name)
+        if entry is None:
+            prompt = PromptTemplate.from_template(template)
+            entry = self._chains.setdefault(name, (prompt, prompt | self.llm | StrOutputParser()))
+        return entry
+    def cache_key(self, name: str, template: str, inputs: dict) -> str:
+        """prompt_cache key of the named prompt's answer, to drop it when the answer turns out wrong"""
+        prompt = self._prompt_chain(name, template)[0]
+        return prompt_cache.key(self.model, prompt.format(**inputs))
+    async def sql(self, name: str, template: str, inputs: dict, on_text=None, use_cache: bool = True) -> str:
+        """SQL answer of the named prompt, see astream_sql; repeated prompts are answered from prompt_cache"""
+        chain = self.chain(name, template)
+        key = self.cache_key(name, template, inputs) if use_cache else None
+        if key is not None:
+            # The SQLite tier is read in a worker thread, never on the event loop
+            sql = await asyncio.to_thread(prompt_cache.get, key)
+            if sql is not None:
+                if on_text:
+                    on_text(sql)
+                return sql
+        async with llm_semaphore:
+            sql = await astream_sql(chain, inputs, on_text)
+        if key is not None and sql:
+            await asyncio.to_thread(prompt_cache.put, key, sql)
+        return sql
+
+class LLMRegistry:
+    def __init__(self) -> None:
+        self._rows = None      # llm_id → llm_tbl row, loaded on first use
+        self._clients = {}     # llm_id → LLMClient, None is DEFAULT_LLM
+        self._generation = 0   # Bumped by refresh, so a load racing a change is never kept
+        self._lock = threading.Lock()
+    async def get(self, llm_id=None) -> LLMClient:
+        """Client of an llm_tbl row, or of DEFAULT_LLM without an llm_id"""
+        client = self._clients.get(llm_id)
+        if client is not None:
+            return client
+        if llm_id is None:
+            row = DEFAULT_LLM
+        else:
+            generation = self._generation
+            rows = self._rows
+            if rows is None:
+                rows = {row["id"]: row for row in await execute_sql_ext_async(LLM_SQL, None)}
+                if generation == self._generation:
+                    self._rows = rows
+            row = rows.get(llm_id)
+            if row is None:
+                raise ValueError(f"LLM {llm_id} not found")
+        with self._lock:
+            client = self._clients.get(llm_id)
+            if client is None:
+                client = LLMClient(row)
+                if llm_id is None or generation == self._generation:
+                    self._clients[llm_id] = client
+        return client
+    def refresh(self) -> None:
+        """Forget every loaded row and client after llm_tbl changed, they reload on next use"""
+        with self._lock:
+            self._generation += 1
+            self._rows = None
+            self._clients = {}
+
+llm_registry = LLMRegistry()
@@ -0,0 +1,149 @@
+"""
+Cache of LLM answers keyed on (model, rendered prompt).
+
+An in-memory LRU in front of a local SQLite file, so repeated questions are
+answered in milliseconds and the cache survives restarts and is shared by the
+worker processes of one host. Entries expire after a TTL and both tiers are
+bounded in size. The SQLite tier is read and written from worker threads, and
+its errors (a file locked by another worker) count as misses or skipped writes.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from src import settings
+
+class PromptCache:
+    def __init__(self, path: str, max_entries: int, ttl: float) -> None:
+        self.path = path                # SQLite file, empty keeps the cache in memory only
+        self.max_entries = max_entries
+        self.ttl = ttl                  # Seconds an answer stays valid
+        self._memory = OrderedDict()    # key → (expires_at, value), least recently used first
+        self._connection = None
+        self._lock = threading.Lock()      # Memory tier and counters
+        self._db_lock = threading.Lock()   # The SQLite connection
+        self._puts = 0
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "puts": 0, "evictions": 0, "expired": 0}
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+    def _db(self):
+        """SQLite connection, opened on first use; None without a path or when it cannot be opened"""
+        if self._connection is None and self.path:
+            try:
+                connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                connection.execute("pragma journal_mode=wal")
+                connection.execute("create table if not exists prompt_cache (key text primary key, value text not null, "
+                                   "expires_at real not null, used_at real not null)")
+                connection.execute("create index if not exists prompt_cache_used_at on prompt_cache (used_at)")
+                self._connection = connection
+            except sqlite3.Error as e:
+                print(f"Prompt cache {self.path} not opened: {e}")
+                self.path = ""
+        return self._connection
+    def get(self, key: str):
+        """Cached answer, None on a miss; blocks on SQLite, call it off the event loop"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+                self.counters["expired"] += 1
+            db = self._db()
+        row = None
+        if db is not None:
+            try:
+                with self._db_lock:
+                    row = db.execute("select value, expires_at from prompt_cache where key = ?", (key,)).fetchone()
+                    if row is not None and row[1] > now:
+                        db.execute("update prompt_cache set used_at = ? where key = ?", (now, key))
+            except sqlite3.Error as e:
+                # Locked by another worker, say: a miss rather than a failed question
+                print(f"Prompt cache read failed: {e}")
+                row = None
+        with self._lock:
+            if row is not None and row[1] > now:
+                self._remember(key, row[1], row[0])
+                self.counters["disk_hits"] += 1
+                return row[0]
+            self.counters["misses"] += 1
+            return None
+    def put(self, key: str, value: str) -> None:
+        """Cache an answer; blocks on SQLite, call it off the event loop"""
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self.counters["puts"] += 1
+            self._puts += 1
+            trim = self._puts % 100 == 0
+            db = self._db()
+        if db is not None:
+            try:
+                with self._db_lock:
+                    db.execute("insert or replace into prompt_cache (key, value, expires_at, used_at) values (?, ?, ?, ?)",
+                               (key, value, expires_at, now))
+                    if trim:
+                        evicted = self._trim(db, now)
+                        with self._lock:
+                            self.counters["evictions"] += evicted
+            except sqlite3.Error as e:
+                # The answer still serves this process from memory
+                print(f"Prompt cache write failed: {e}")
+    def delete(self, key: str) -> None:
+        """Drop an answer found wrong after it was cached; blocks on SQLite, call it off the event loop"""
+        with self._lock:
+            self._memory.pop(key, None)
+            db = self._db()
+        if db is not None:
+            try:
+                with self._db_lock:
+                    db.execute("delete from prompt_cache where key = ?", (key,))
+            except sqlite3.Error as e:
+                print(f"Prompt cache delete failed: {e}")
+    def _remember(self, key: str, expires_at: float, value: str) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+    def _trim(self, db, now: float) -> int:
+        """Drop expired rows and the least recently used ones beyond max_entries, return how many of the latter"""
+        db.execute("delete from prompt_cache where expires_at <= ?", (now,))
+        cursor = db.execute("delete from prompt_cache where key in (select key from prompt_cache order by used_at desc limit -1 offset ?)",
+                            (self.max_entries,))
+        return max(cursor.rowcount, 0)
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            db = self._db()
+        if db is not None:
+            try:
+                with self._db_lock:
+                    db.execute("delete from prompt_cache")
+            except sqlite3.Error as e:
+                print(f"Prompt cache not cleared: {e}")
+    def stats(self) -> dict:
+        with self._lock:
+            db = self._db()
+        disk_entries = 0
+        if db is not None:
+            try:
+                with self._db_lock:
+                    disk_entries = db.execute("select count(*) from prompt_cache").fetchone()[0]
+            except sqlite3.Error as e:
+                print(f"Prompt cache not counted: {e}")
+                disk_entries = None
+        with self._lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = lookups - self.counters["misses"]
+            return {**self.counters, "hit_rate": hits / lookups if lookups else 0.0, "memory_entries": len(self._memory),
+                    "disk_entries": disk_entries, "max_entries": self.max_entries, "ttl": self.ttl}
+
+prompt_cache = PromptCache(settings.PROMPT_CACHE_PATH, settings.PROMPT_CACHE_MAX_ENTRIES, settings.PROMPT_CACHE_TTL)
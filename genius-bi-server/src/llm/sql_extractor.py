@@ -0,0 +1,133 @@
+"""
+Streaming extraction of the SQL statement from an LLM answer.
+
+Reasoning (<think> blocks, prose) and markdown fences are dropped; SQL text is
+passed on as it streams, and the stream ends at the end of the first complete
+statement (a ';', a closing fence, or a blank line after parseable SQL), so the
+rest of the generation is never waited for.
+"""
+import re
+
+import sqlglot
+from sqlglot.errors import ParseError
+
+THINK_BLOCK_PATTERN = re.compile(r"<think>.*?</think>", re.DOTALL | re.IGNORECASE)
+# A statement starts a line, possibly right after an opening fence; with only counts as "with name [(columns)] as (",
+# so prose opening with "With ..." is not taken for SQL
+SQL_START_PATTERN = re.compile(r"(?:^|\n)[ \t]*(?:```[a-zA-Z]*[ \t]*\n?[ \t]*)?"
+                               r"(select\s|with\s+(?:recursive\s+)?(?:[A-Za-z_]\w*|`[^`\n]+`)\s*(?:\([^()]*\)\s*)?as\s*\()", re.IGNORECASE)
+FENCE_PATTERN = re.compile(r"```[a-zA-Z]*")
+# Words that carry a statement on past a blank line
+CONTINUATION_WORDS = {"select", "from", "where", "group", "order", "having", "limit", "and", "or", "not", "union", "join",
+                      "left", "right", "inner", "outer", "cross", "on", "as", "case", "when", "then", "else", "end", "with"}
+
+class SQLExtractor:
+    """Feed answer chunks, get back the SQL text each one completes"""
+    def __init__(self) -> None:
+        self._text = ""      # Answer received so far, from the statement start once it is found
+        self._started = False
+        self._scanned = 0    # Characters of _text already scanned for the statement end
+        self._emitted = 0    # Characters of _text already returned
+        self._quote = None   # Open quote character at _scanned
+        self.done = False
+    def feed(self, chunk: str) -> str:
+        if self.done:
+            return ""
+        self._text += chunk
+        if not self._started:
+            text = THINK_BLOCK_PATTERN.sub("", self._text)
+            if re.search(r"<think>", text, re.IGNORECASE):
+                # Still reasoning
+                return ""
+            match = SQL_START_PATTERN.search(text)
+            if match is None:
+                return ""
+            self._text = text[match.start(1):]
+            self._started = True
+        return self._scan()
+    def finish(self) -> str:
+        """SQL left once the answer ended without a terminator"""
+        if self.done:
+            return ""
+        self.done = True
+        if not self._started:
+            # No recognizable statement, hand over the answer without reasoning and fences for validation to judge
+            return FENCE_PATTERN.sub("", THINK_BLOCK_PATTERN.sub("", self._text)).strip()
+        end = len(self._text.rstrip().rstrip("`").rstrip())
+        return self._text[self._emitted:end] if end > self._emitted else ""
+    def _scan(self) -> str:
+        text = self._text
+        i = self._scanned
+        while i < len(text):
+            char = text[i]
+            if self._quote:
+                if char == "\\":
+                    i += 2
+                    continue
+                if char == self._quote:
+                    self._quote = None
+            elif char in "'\"`":
+                if text.startswith("```", i):
+                    return self._end(i)
+                if char == "`" and len(text) - i < 3 and text[i:] == "`" * (len(text) - i):
+                    # Could still become a closing fence
+                    break
+                self._quote = char
+            elif char == ";":
+                return self._end(i)
+            elif char == "\n" and text.startswith("\n\n", i):
+                following = re.match(r"\s*(?:([A-Za-z_]+)(?=[^A-Za-z_])|([^A-Za-z_\s]))", text[i:])
+                if following is None:
+                    # Wait for the next word to tell whether the statement goes on
+                    break
+                word = (following.group(1) or following.group(2)).lower()
+                if word not in CONTINUATION_WORDS and word not in "(),`'" and self._parses(text[:i]):
+                    return self._end(i)
+            elif char == "\n" and i == len(text) - 1:
+                # Could still become a blank line
+                break
+            i += 1
+        self._scanned = i
+        # Trailing whitespace waits for what follows, it may precede the end of the statement
+        end = max(self._emitted, len(text[:i].rstrip()))
+        sql = text[self._emitted:end]
+        self._emitted = end
+        return sql
+    def _end(self, end: int) -> str:
+        self.done = True
+        end = len(self._text[:end].rstrip())
+        sql = self._text[self._emitted:end] if end > self._emitted else ""
+        self._emitted = end
+        return sql
+    @staticmethod
+    def _parses(sql: str) -> bool:
+        try:
+            return sqlglot.parse_one(sql, read="mysql") is not None
+        except ParseError:
+            return False
+
+async def astream_sql(chain, inputs: dict, on_text=None) -> str:
+    """Run a text chain and return the SQL statement of its answer, cancelling the generation once it is complete
+
+    on_text is called with every piece of SQL as it streams."""
+    extractor = SQLExtractor()
+    sql = ""
+    stream = chain.astream(inputs)
+    try:
+        async for chunk in stream:
+            text = extractor.feed(chunk)
+            if text:
+                sql += text
+                if on_text:
+                    on_text(text)
+            if extractor.done:
+                break
+    finally:
+        # Closing the stream closes the model's response, nothing more is generated
+        await stream.aclose()
+    text = extractor.finish()
+    if text:
+        sql += text
+        if on_text:
+            on_text(text)
+    return sql
@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from enum import IntEnum
+
+class NatureKind(IntEnum):
+    DIMENSION = 1
+    METRIC = 2
+    TERM = 3
+
+@dataclass(frozen=True, slots=True)
+class Nature:
+    """What an alias refers to: a model dimension or metric, or a term (model_id 0)"""
+    kind: NatureKind
+    model_id: int
+    field_id: int
+
+    @property
+    def is_dimension(self) -> bool:
+        return self.kind == NatureKind.DIMENSION
+
+    @property
+    def is_metric(self) -> bool:
+        return self.kind == NatureKind.METRIC
+
+    @property
+    def is_term(self) -> bool:
+        return self.kind == NatureKind.TERM
+
+    @staticmethod
+    def of(kind: int, model_id: int, field_id: int) -> "Nature":
+        """Interned Nature, equal natures share one instance"""
+        key = (int(kind), int(model_id), int(field_id))
+        nature = _interned.get(key)
+        if nature is None:
+            nature = _interned.setdefault(key, Nature(NatureKind(key[0]), key[1], key[2]))
+        return nature
+
+    @staticmethod
+    def parse(text: str) -> "Nature":
+        """Parse the legacy string form: _{model_id}_{id}_dimension, _{model_id}_{id}_metric or _{id}_term"""
+        parts = text.split('_')
+        kind = NatureKind[parts[-1].upper()]
+        if kind == NatureKind.TERM:
+            return Nature.of(kind, 0, parts[1])
+        return Nature.of(kind, parts[1], parts[2])
+
+    def __str__(self) -> str:
+        if self.kind == NatureKind.TERM:
+            return f"_{self.field_id}_term"
+        return f"_{self.model_id}_{self.field_id}_{self.kind.name.lower()}"
+
+_interned = {}
@@ -1,7 +1,19 @@
-
 from dataclasses import dataclass
+from src.models.nature import Nature, NatureKind
 
 @dataclass
 class WordWithNature:
     word: str
-    nature: str
\ No newline at end of file
+    nature: Nature
+
+    @classmethod
+    def of_dimension(cls, word: str, model_id: int, dimension_id: int) -> "WordWithNature":
+        return cls(word, Nature.of(NatureKind.DIMENSION, model_id, dimension_id))
+
+    @classmethod
+    def of_metric(cls, word: str, model_id: int, metric_id: int) -> "WordWithNature":
+        return cls(word, Nature.of(NatureKind.METRIC, model_id, metric_id))
+
+    @classmethod
+    def of_term(cls, word: str, term_id: int) -> "WordWithNature":
+        return cls(word, Nature.of(NatureKind.TERM, 0, term_id))
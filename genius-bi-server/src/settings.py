@@ -0,0 +1,46 @@
+"""
+Process-wide settings, read from environment variables.
+"""
+import os
+import tempfile
+
+# Compiled lexicon snapshot shared by every worker process, set to an empty string to keep the lexicon in memory only
+LEXICON_SNAPSHOT_PATH = os.environ.get("GENIUS_BI_LEXICON_SNAPSHOT", os.path.join(tempfile.gettempdir(), "genius_bi_lexicon.bin"))
+# Seconds between checks that the lexicon still matches the metadata tables, which other workers may have changed
+LEXICON_CHECK_SECONDS = float(os.environ.get("GENIUS_BI_LEXICON_CHECK_SECONDS", "5"))
+
+# spaCy model whose word vectors match question spans to aliases by meaning (e.g. en_core_web_md), empty disables it
+ALIAS_VECTORS_MODEL = os.environ.get("GENIUS_BI_ALIAS_VECTORS_MODEL", "")
+# Saved alias embedding matrix (.npy) and its aliases (.json), set to an empty string to keep them in memory only
+ALIAS_VECTORS_PATH = os.environ.get("GENIUS_BI_ALIAS_VECTORS", os.path.join(tempfile.gettempdir(), "genius_bi_alias_vectors"))
+
+# Questions parsed concurrently queue on these instead of on server threads
+LLM_CONCURRENCY = int(os.environ.get("GENIUS_BI_LLM_CONCURRENCY", "8"))
+DB_CONCURRENCY = int(os.environ.get("GENIUS_BI_DB_CONCURRENCY", "16"))
+
+# Answer every LLM call with the offline fake (src/llm/fake_llm.py), for load tests without DashScope access
+FAKE_LLM = os.environ.get("GENIUS_BI_FAKE_LLM", "").lower() in ("1", "true", "yes")
+# Simulated time to first token (seconds), token rate and failure rate of the fake
+FAKE_LLM_TTFT = float(os.environ.get("GENIUS_BI_FAKE_LLM_TTFT", "0.5"))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.environ.get("GENIUS_BI_FAKE_LLM_TOKENS_PER_SECOND", "50"))
+FAKE_LLM_ERROR_RATE = float(os.environ.get("GENIUS_BI_FAKE_LLM_ERROR_RATE", "0"))
+
+# LLM answer cache: SQLite file shared by the workers (empty keeps it in memory only), entries kept and their lifetime in seconds
+PROMPT_CACHE_PATH = os.environ.get("GENIUS_BI_PROMPT_CACHE", os.path.join(tempfile.gettempdir(), "genius_bi_prompt_cache.sqlite3"))
+PROMPT_CACHE_MAX_ENTRIES = int(os.environ.get("GENIUS_BI_PROMPT_CACHE_MAX_ENTRIES", "10000"))
+PROMPT_CACHE_TTL = float(os.environ.get("GENIUS_BI_PROMPT_CACHE_TTL", "86400"))
+
+# Whole question plans (the SQL semantic transition produces) kept per worker
+PLAN_CACHE_MAX_ENTRIES = int(os.environ.get("GENIUS_BI_PLAN_CACHE_MAX_ENTRIES", "10000"))
+# Seconds a dataset's version stamp is reused before it is read again; changes made here re-read it at once
+PLAN_CACHE_VERSION_SECONDS = float(os.environ.get("GENIUS_BI_PLAN_CACHE_VERSION_SECONDS", "5"))
+
+# Validated question → SQL pairs used as few-shot examples: SQLite file (empty keeps them in memory only) and pairs kept per dataset
+EXAMPLE_STORE_PATH = os.environ.get("GENIUS_BI_EXAMPLE_STORE", os.path.join(tempfile.gettempdir(), "genius_bi_examples.sqlite3"))
+EXAMPLE_STORE_MAX_EXAMPLES = int(os.environ.get("GENIUS_BI_EXAMPLE_STORE_MAX_EXAMPLES", "100000"))
+# Examples put in the parsing prompt, and the similarity from which a stored question's SQL is reused without the LLM
+EXAMPLE_TOP_K = int(os.environ.get("GENIUS_BI_EXAMPLE_TOP_K", "3"))
+EXAMPLE_REUSE_SCORE = float(os.environ.get("GENIUS_BI_EXAMPLE_REUSE_SCORE", "0.95"))
+
+# Days of data a question on a partitioned model reads when it states no range on the partition time field, 0 reads everything
+PARTITION_WINDOW_DAYS = int(os.environ.get("GENIUS_BI_PARTITION_WINDOW_DAYS", "90"))
@@ -0,0 +1,128 @@
+"""
+Semantic alias matching with word vectors, for synonyms no alias or term lists.
+
+Every alias is embedded once as the normalized mean of its word vectors (a local
+spaCy vectors model, no network) into one contiguous float32 matrix. Question
+spans are embedded in one batch and scored against all aliases with a single
+matrix multiply. A text with a word the model has no vector for ("tpv") is not
+embedded at all rather than as its other words, and spans made only of stop or
+filler words are never scored. The matrix is saved next to the lexicon snapshot with np.save
+and memory-mapped back on the next start while the aliases are unchanged.
+"""
+import functools
+import hashlib
+import json
+import os
+
+import numpy as np
+import spacy
+from spacy.lang.en.stop_words import STOP_WORDS
+
+from src.models.nature import Nature
+from src.utils.spacy_util import SPACY_EXCLUDE, normalize_tokens
+from src.utils.sql_template import FILLER_WORDS
+
+# Bumped whenever embed changes, so matrices saved by an older one are rebuilt
+EMBEDDING_VERSION = 2
+# Words that never make a span worth matching on their own
+NON_CONTENT_WORDS = frozenset(STOP_WORDS) | FILLER_WORDS
+
+@functools.lru_cache(maxsize=None)
+def get_vectors_nlp(model: str):
+    """Load a spaCy model for its vectors table only"""
+    return spacy.load(model, exclude=SPACY_EXCLUDE)
+
+def embed(model: str, texts: list) -> np.ndarray:
+    """Unit length mean word vector of each text, a zero row (scoring 0 against anything) when one of its words has no vector"""
+    vocab = get_vectors_nlp(model).vocab
+    matrix = np.zeros((len(texts), vocab.vectors_length), dtype=np.float32)
+    for i, text in enumerate(texts):
+        words = normalize_tokens(text)
+        if words and all(vocab.has_vector(word) for word in words):
+            matrix[i] = np.mean([vocab.get_vector(word) for word in words], axis=0)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+def fingerprint(model: str, entries) -> str:
+    """Stamp of a vectors model and alias set, so a saved matrix is only reused for the same aliases"""
+    digest = hashlib.sha1(f"{model}\0{EMBEDDING_VERSION}".encode("utf-8"))
+    for sentence, nature in sorted((sentence, str(nature)) for sentence, nature in entries):
+        digest.update(f"\0{sentence}\0{nature}".encode("utf-8"))
+    return digest.hexdigest()
+
+def question_spans(tokens: list, max_words: int) -> list:
+    """Spans of up to max_words tokens with at least one word besides stop and filler words"""
+    return [" ".join(tokens[start:end]) for start in range(len(tokens))
+            for end in range(start + 1, min(len(tokens), start + max_words) + 1)
+            if any(token not in NON_CONTENT_WORDS for token in tokens[start:end])]
+
+class AliasVectors:
+    """Row i of matrix is the embedding of sentences[i], which maps to natures[i]"""
+    def __init__(self, model: str, matrix: np.ndarray, sentences: list, natures: list, version: str) -> None:
+        self.model = model
+        self.matrix = matrix
+        self.sentences = sentences
+        self.natures = natures
+        self.version = version
+    @classmethod
+    def build(cls, model: str, entries) -> "AliasVectors":
+        entries = list(entries)
+        sentences = [sentence for sentence, _ in entries]
+        return cls(model, embed(model, sentences), sentences, [nature for _, nature in entries], fingerprint(model, entries))
+    @classmethod
+    def open_if_current(cls, path: str, model: str, entries):
+        """Map the saved matrix at path, or return None when it is missing, unreadable or built from other aliases"""
+        try:
+            with open(f"{path}.json", encoding="utf-8") as f:
+                meta = json.load(f)
+            matrix = np.load(f"{path}.npy", mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != fingerprint(model, entries) or len(matrix) != len(meta["sentences"]):
+            return None
+        natures = [Nature.of(*nature) for nature in meta["natures"]]
+        return cls(model, matrix, meta["sentences"], natures, meta["version"])
+    def save(self, path: str) -> None:
+        """Write the matrix and its aliases, replacing any existing files atomically"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(self.matrix, dtype=np.float32))
+        os.replace(tmp_path, f"{path}.npy")
+        meta = {"version": self.version, "sentences": self.sentences,
+                "natures": [[int(nature.kind), nature.model_id, nature.field_id] for nature in self.natures]}
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, f"{path}.json")
+    def updated(self, deleted: list = (), inserted: list = ()) -> "AliasVectors":
+        """Copy with alias changes applied, embedding only the inserted aliases"""
+        removed = {(term.word, term.nature) for term in deleted if term.word}
+        keep = [i for i, entry in enumerate(zip(self.sentences, self.natures)) if entry not in removed]
+        added = [(term.word, term.nature) for term in inserted if term.word]
+        sentences = [self.sentences[i] for i in keep] + [sentence for sentence, _ in added]
+        natures = [self.natures[i] for i in keep] + [nature for _, nature in added]
+        matrix = np.concatenate([self.matrix[keep], embed(self.model, [sentence for sentence, _ in added])])
+        return AliasVectors(self.model, matrix, sentences, natures, fingerprint(self.model, zip(sentences, natures)))
+    def rows_of(self, natures: set) -> np.ndarray:
+        """Row numbers of the aliases mapping to one of natures"""
+        return np.fromiter((i for i, nature in enumerate(self.natures) if nature in natures), dtype=np.intp)
+    def search(self, texts: list, top_k: int = 1, min_score: float = 0.0, rows: np.ndarray = None) -> list:
+        """Best aliases for each text by cosine similarity, as (text, sentence, nature, score) tuples
+
+        rows restricts the search to those aliases."""
+        if not texts or not len(self.sentences):
+            return []
+        candidates = self.matrix if rows is None else self.matrix[rows]
+        if not len(candidates):
+            return []
+        scores = embed(self.model, texts) @ candidates.T
+        top_k = min(top_k, scores.shape[1])
+        best = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        results = []
+        for i, text in enumerate(texts):
+            for j in best[i]:
+                score = float(scores[i, j])
+                if score >= min_score:
+                    row = int(j) if rows is None else int(rows[j])
+                    results.append((text, self.sentences[row], self.natures[row], score))
+        return results
@@ -0,0 +1,10 @@
+"""
+Process-wide limits on concurrent LLM calls and metadata queries of the async
+parsing path; waiting requests queue on these without holding a thread.
+"""
+import asyncio
+
+from src import settings
+
+llm_semaphore = asyncio.Semaphore(settings.LLM_CONCURRENCY)
+db_semaphore = asyncio.Semaphore(settings.DB_CONCURRENCY)
@@ -0,0 +1,200 @@
+"""
+Store of validated question → SQL pairs per dataset, used as few-shot examples.
+
+Pairs come from questions whose parsed SQL passed validation. Each dataset gets an
+in-memory TF-IDF index over its questions: an inverted index from word to the
+questions using it, cosine scored against the candidates its rarer words point
+at, so a lookup reads a few short posting lists instead of every stored pair.
+The pairs persist in a local SQLite file and a dataset's index is rebuilt from it
+on first use.
+"""
+import heapq
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import date
+
+from src import settings
+from src.utils.spacy_util import normalize_tokens
+from src.utils.sql_template import AVERAGE_WORDS, FILLER_WORDS
+from src.utils.time_range import covered_days
+
+# Questions scored exactly per lookup, gathered from the rarest query words first
+MAX_CANDIDATES = 256
+# Words a question can differ in and still mean the same SQL; avg and sum are not interchangeable
+IGNORED_WORDS = FILLER_WORDS - AVERAGE_WORDS
+
+def content_words(tokens: list) -> tuple:
+    """The words of a question that decide its SQL, in order"""
+    return tuple(token for token in tokens if token not in IGNORED_WORDS)
+
+class Example:
+    __slots__ = ("question", "sql", "schema", "current_date", "terms", "content", "_ranges")
+    def __init__(self, question: str, sql: str, schema: str, current_date: str, tokens: list) -> None:
+        self.question = question
+        self.sql = sql
+        self.schema = schema
+        self.current_date = current_date
+        self.terms = Counter(tokens)   # word → count in the question
+        # Negations, numbers and word order all have to match for the SQL to be reused
+        self.content = content_words(tokens)
+        self._ranges = None
+
+    @property
+    def ranges(self) -> list:
+        """Days the question's time ranges covered on the date it was asked"""
+        if self._ranges is None:
+            self._ranges = covered_days(self.question, date.fromisoformat(self.current_date))
+        return self._ranges
+
+    def prompt_line(self) -> str:
+        """The example in the format of the parsing prompt's examples"""
+        return f"Query:{self.question},Schema:{self.schema},ExtraInfo:CurrentDate=[{self.current_date}],SQL:{self.sql}"
+
+class DatasetExamples:
+    """TF-IDF index of one dataset's questions"""
+    def __init__(self) -> None:
+        self.examples = []   # Example by id
+        self.ids = {}        # normalized question → id
+        self.postings = {}   # word → ids of the questions using it
+    def idf(self, term: str) -> float:
+        return math.log((len(self.examples) + 1) / (len(self.postings.get(term, ())) + 1)) + 1
+    def add(self, example: Example, key: str) -> None:
+        id = self.ids.get(key)
+        if id is not None:
+            # Same question again, the latest SQL wins
+            self.examples[id] = example
+            return
+        id = len(self.examples)
+        self.examples.append(example)
+        self.ids[key] = id
+        for term in example.terms:
+            self.postings.setdefault(term, []).append(id)
+    def search(self, terms: Counter, top_k: int) -> list:
+        """Up to top_k (score, Example) pairs, most similar first"""
+        if not self.examples or not terms:
+            return []
+        idfs = {term: self.idf(term) for term in terms}
+        weights = {term: count * idfs[term] for term, count in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        # Query weight times idf, so a candidate's score is its word counts dotted with these
+        factors = {term: weight * idfs[term] for term, weight in weights.items()}
+        candidates = set()
+        for term in sorted(weights, key=lambda term: len(self.postings.get(term, ()))):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            if candidates and len(candidates) + len(posting) > MAX_CANDIDATES:
+                break
+            # The most recent questions of a word too common to read whole
+            candidates.update(posting[-MAX_CANDIDATES:])
+        scored = []
+        for id in candidates:
+            example = self.examples[id]
+            dot = 0.0
+            square = 0.0
+            # Candidate norms use the idfs of this lookup, so a score never exceeds 1
+            for term, count in example.terms.items():
+                idf = idfs.get(term)
+                if idf is None:
+                    idf = idfs[term] = self.idf(term)
+                square += (count * idf) ** 2
+                if factor := factors.get(term):
+                    dot += factor * count
+            scored.append((dot / (norm * (math.sqrt(square) or 1.0)), id))
+        return [(score, self.examples[id]) for score, id in heapq.nlargest(top_k, scored)]
+
+class ExampleStore:
+    def __init__(self, path: str, max_examples: int) -> None:
+        self.path = path                  # SQLite file, empty keeps the examples in memory only
+        self.max_examples = max_examples  # Per dataset, further questions are not added
+        self._datasets = {}               # dataset_id → DatasetExamples
+        self._connection = None
+        self._lock = threading.Lock()
+        self.counters = {"lookups": 0, "reused": 0, "added": 0}
+    def _db(self):
+        """SQLite connection, opened on first use; None without a path or when it cannot be opened"""
+        if self._connection is None and self.path:
+            try:
+                connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                connection.execute("pragma journal_mode=wal")
+                connection.execute("create table if not exists sql_examples (dataset_id text not null, question text not null, "
+                                   "sql text not null, schema text not null, asked_on text not null, created_at real not null, "
+                                   "primary key (dataset_id, question))")
+                self._connection = connection
+            except sqlite3.Error as e:
+                print(f"Example store {self.path} not opened: {e}")
+                self.path = ""
+        return self._connection
+    def _dataset(self, dataset_id: str) -> DatasetExamples:
+        """Index of a dataset, loaded from SQLite on first use"""
+        examples = self._datasets.get(dataset_id)
+        if examples is None:
+            examples = self._datasets[dataset_id] = DatasetExamples()
+            db = self._db()
+            if db is not None:
+                try:
+                    rows = db.execute("select question, sql, schema, asked_on from sql_examples where dataset_id = ? "
+                                      "order by created_at", (dataset_id,)).fetchall()
+                except sqlite3.Error as e:
+                    # Locked by another worker, say: no examples this time, the next lookup tries again
+                    print(f"Examples of dataset {dataset_id} not loaded: {e}")
+                    del self._datasets[dataset_id]
+                    return examples
+                for question, sql, schema, current_date in rows:
+                    tokens = normalize_tokens(question)
+                    examples.add(Example(question, sql, schema, current_date, tokens), " ".join(tokens))
+        return examples
+    def search(self, dataset_id, query: str, top_k: int) -> list:
+        """The top_k stored examples most similar to query, as (score, Example) pairs"""
+        tokens = normalize_tokens(query)
+        with self._lock:
+            self.counters["lookups"] += 1
+            examples = self._dataset(str(dataset_id))
+            id = examples.ids.get(" ".join(tokens))
+            if id is not None:
+                # Asked before, up to case and punctuation
+                found = [(1.0, examples.examples[id])]
+                return found + [pair for pair in examples.search(Counter(tokens), top_k) if pair[1] is not found[0][1]][:top_k - 1]
+            return examples.search(Counter(tokens), top_k)
+    def reusable(self, query: str, found: list, min_score: float, today: date = None):
+        """SQL of the best example when it is a near duplicate of query: the same words but fillers, and the same time ranges
+
+        Relative ranges (last month) only match when they still cover the same days."""
+        if not found or found[0][0] < min_score:
+            return None
+        example = found[0][1]
+        if example.content != content_words(normalize_tokens(query)) or example.ranges != covered_days(query, today or date.today()):
+            return None
+        with self._lock:
+            self.counters["reused"] += 1
+        return example.sql
+    def add(self, dataset_id, query: str, sql: str, schema: str, current_date: str) -> None:
+        """Remember the validated SQL of a question; blocks on SQLite, call it off the event loop"""
+        dataset_id = str(dataset_id)
+        tokens = normalize_tokens(query)
+        if not tokens:
+            return
+        with self._lock:
+            examples = self._dataset(dataset_id)
+            key = " ".join(tokens)
+            if key not in examples.ids and len(examples.examples) >= self.max_examples:
+                return
+            examples.add(Example(query, sql, schema, current_date, tokens), key)
+            self.counters["added"] += 1
+            db = self._db()
+            if db is not None:
+                try:
+                    db.execute("insert or replace into sql_examples (dataset_id, question, sql, schema, asked_on, created_at) "
+                               "values (?, ?, ?, ?, ?, ?)", (dataset_id, query, sql, schema, current_date, time.time()))
+                except sqlite3.Error as e:
+                    # The example still serves this process, it is only missing from the file
+                    print(f"Example of dataset {dataset_id} not saved: {e}")
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "datasets": len(self._datasets),
+                    "examples": sum(len(examples.examples) for examples in self._datasets.values())}
+
+example_store = ExampleStore(settings.EXAMPLE_STORE_PATH, settings.EXAMPLE_STORE_MAX_EXAMPLES)
@@ -0,0 +1,43 @@
+"""
+Join planning for semantic transition.
+
+The foreign key dimensions of a dataset's models (express = 'table.column' they
+reference) form a graph of tables, built once per dataset by the semantic catalog.
+A question's SQL only joins the tables its columns come from: the shortest paths
+from the fact table (that of its first metric) to each of them, so tables none
+of its columns need are never joined.
+"""
+from collections import deque
+
+class JoinGraph:
+    def __init__(self, relations: list) -> None:
+        self.edges = {}  # table → [(other table, join condition)]
+        for item in relations:
+            express = item['express'] or ''
+            if '.' not in express:
+                continue
+            other = express.split('.')[0]
+            condition = f"{item['table_name']}.{item['field_name']} = {express}"
+            self.edges.setdefault(item['table_name'], []).append((other, condition))
+            self.edges.setdefault(other, []).append((item['table_name'], condition))
+    def plan(self, tables: list) -> tuple:
+        """tables[0] and the (table, condition) left joins the other tables need, in breadth first order
+
+        Tables the graph cannot reach are left out, as no condition could join them; callers check for them."""
+        root = tables[0]
+        parents = {root: None}  # table → (parent table, join condition)
+        order = [root]
+        queue = deque([root])
+        while queue:
+            table = queue.popleft()
+            for other, condition in self.edges.get(table, ()):
+                if other not in parents:
+                    parents[other] = (table, condition)
+                    order.append(other)
+                    queue.append(other)
+        needed = set()
+        for table in tables[1:]:
+            while table in parents and table not in needed and table != root:
+                needed.add(table)
+                table = parents[table][0]
+        return root, [(table, parents[table][1]) for table in order if table in needed]
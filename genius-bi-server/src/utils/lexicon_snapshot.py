@@ -0,0 +1,273 @@
+"""
+Compiled, memory-mapped form of the alias trie.
+
+The lexicon is flattened into sorted integer arrays (CSR children, failure links,
+interned token / alias string tables, natures as (kind, model_id, field_id) ids)
+and written to one file. Every
+worker process maps that file read-only, so they all share a single page-cache
+copy instead of each holding its own TrieNode tree.
+
+Build it ahead of a deployment with:  python -m src.utils.lexicon_snapshot
+"""
+import heapq
+import itertools
+import mmap
+import os
+import struct
+from array import array
+from collections import Counter, deque
+
+from src.models.nature import Nature
+from src.utils.spacy_util import SentenceTrie, completion_score, max_completion_length, normalize_tokens
+
+MAGIC = b"GBLX"
+FORMAT_VERSION = 2
+# magic, format version, nodes, edges, tokens, entries, sentences, natures, version stamp length
+HEADER = struct.Struct("<4sIIIIIIII")
+
+def _padding(length: int) -> int:
+    """Sections start on 8 byte boundaries"""
+    return -length % 8
+
+def _string_table(strings: list) -> tuple:
+    """Concatenate strings into (offsets, blob); string i is blob[offsets[i]:offsets[i + 1]]"""
+    offsets = array("I", [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+def write_snapshot(trie: SentenceTrie, path: str, version: str) -> None:
+    """Flatten a SentenceTrie into a snapshot file, replacing any existing one atomically"""
+    if not trie._compiled:
+        trie.compile()
+
+    # Number nodes breadth first, root is 0
+    nodes = [trie.root]
+    node_ids = {id(trie.root): 0}
+    queue = deque([trie.root])
+    while queue:
+        node = queue.popleft()
+        for child in node.children.values():
+            node_ids[id(child)] = len(nodes)
+            nodes.append(child)
+            queue.append(child)
+
+    tokens = sorted({word for node in nodes for word in node.children}, key=lambda word: word.encode("utf-8"))
+    token_ids = {word: i for i, word in enumerate(tokens)}
+    sentences, sentence_ids = [], {}
+    nature_ids = {}
+
+    nature_kind, nature_model, nature_field = array("I"), array("Q"), array("Q")
+    depth, fail = array("I"), array("I")
+    edge_start, entry_start = array("I", [0]), array("I", [0])
+    edge_token, edge_child = array("I"), array("I")
+    entry_sentence, entry_nature = array("I"), array("I")
+    for node in nodes:
+        depth.append(node.depth)
+        fail.append(node_ids[id(node.fail)] if node.fail is not None else 0)
+        for word in sorted(node.children, key=token_ids.__getitem__):
+            edge_token.append(token_ids[word])
+            edge_child.append(node_ids[id(node.children[word])])
+        edge_start.append(len(edge_token))
+        for sentence, nature in node.entries:
+            if sentence not in sentence_ids:
+                sentence_ids[sentence] = len(sentences)
+                sentences.append(sentence)
+            if nature not in nature_ids:
+                nature_ids[nature] = len(nature_kind)
+                nature_kind.append(nature.kind)
+                nature_model.append(nature.model_id)
+                nature_field.append(nature.field_id)
+            entry_sentence.append(sentence_ids[sentence])
+            entry_nature.append(nature_ids[nature])
+        entry_start.append(len(entry_sentence))
+
+    version_bytes = version.encode("utf-8")
+    sections = [version_bytes]
+    for offsets, blob in (_string_table(tokens), _string_table(sentences)):
+        sections += [offsets, blob]
+    sections += [nature_kind, nature_model, nature_field, depth, fail, edge_start, entry_start, edge_token, edge_child, entry_sentence, entry_nature]
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(nodes), len(edge_token), len(tokens),
+                            len(entry_sentence), len(sentences), len(nature_kind), len(version_bytes)))
+        f.write(b"\0" * _padding(HEADER.size))
+        for section in sections:
+            data = section.tobytes() if isinstance(section, array) else section
+            f.write(data)
+            f.write(b"\0" * _padding(len(data)))
+    os.replace(tmp_path, path)
+
+class CompiledTrie:
+    """Read-only SentenceTrie backed by a memory-mapped snapshot file"""
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mm)
+        magic, format_version, n_nodes, n_edges, n_tokens, n_entries, n_sentences, n_natures, version_length = HEADER.unpack_from(buf)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a lexicon snapshot")
+        offset = HEADER.size + _padding(HEADER.size)
+
+        def take_bytes(length):
+            nonlocal offset
+            view = buf[offset:offset + length]
+            offset += length + _padding(length)
+            return view
+
+        def take_u32(count):
+            return take_bytes(4 * count).cast("I")
+
+        def take_u64(count):
+            return take_bytes(8 * count).cast("Q")
+
+        self.version = bytes(take_bytes(version_length)).decode("utf-8")
+        self._token_offsets = take_u32(n_tokens + 1)
+        self._token_blob = take_bytes(self._token_offsets[-1])
+        self._sentence_offsets = take_u32(n_sentences + 1)
+        self._sentence_blob = take_bytes(self._sentence_offsets[-1])
+        self._nature_kind = take_u32(n_natures)
+        self._nature_model = take_u64(n_natures)
+        self._nature_field = take_u64(n_natures)
+        self._depth = take_u32(n_nodes)
+        self._fail = take_u32(n_nodes)
+        self._edge_start = take_u32(n_nodes + 1)
+        self._entry_start = take_u32(n_nodes + 1)
+        self._edge_token = take_u32(n_edges)
+        self._edge_child = take_u32(n_edges)
+        self._entry_sentence = take_u32(n_entries)
+        self._entry_nature = take_u32(n_entries)
+
+    @classmethod
+    def open_if_current(cls, path: str, version: str):
+        """Map the snapshot at path, or return None when it is missing, unreadable or built from other metadata"""
+        try:
+            trie = cls(path)
+        except (OSError, ValueError, TypeError):
+            return None
+        return trie if trie.version == version else None
+
+    def tokenize(self, text: str) -> list:
+        return normalize_tokens(text)
+
+    def _token(self, token_id: int) -> str:
+        return str(self._token_blob[self._token_offsets[token_id]:self._token_offsets[token_id + 1]], "utf-8")
+
+    def _sentence(self, entry: int) -> str:
+        i = self._entry_sentence[entry]
+        return str(self._sentence_blob[self._sentence_offsets[i]:self._sentence_offsets[i + 1]], "utf-8")
+
+    def _nature(self, entry: int) -> Nature:
+        i = self._entry_nature[entry]
+        return Nature.of(self._nature_kind[i], self._nature_model[i], self._nature_field[i])
+
+    def _token_id(self, word: str) -> int:
+        """Binary search the sorted token table, -1 when the word is not in the lexicon"""
+        key = word.encode("utf-8")
+        lo, hi = 0, len(self._token_offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            token = bytes(self._token_blob[self._token_offsets[mid]:self._token_offsets[mid + 1]])
+            if token < key:
+                lo = mid + 1
+            elif token > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def _child(self, node: int, token_id: int) -> int:
+        """Binary search node's children (sorted by token id), -1 when there is no such edge"""
+        lo, hi = self._edge_start[node], self._edge_start[node + 1]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            token = self._edge_token[mid]
+            if token < token_id:
+                lo = mid + 1
+            elif token > token_id:
+                hi = mid
+            else:
+                return self._edge_child[mid]
+        return -1
+
+    def has_path(self, tokens: list) -> bool:
+        """Same as SentenceTrie.has_path"""
+        node = 0
+        for word in tokens:
+            token_id = self._token_id(word)
+            node = self._child(node, token_id) if token_id >= 0 else -1
+            if node < 0:
+                return False
+        return True
+
+    def match(self, tokens: list):
+        """Same scan as SentenceTrie.match, yielding (node id, end)"""
+        node = 0
+        for end, word in enumerate(tokens):
+            token_id = self._token_id(word)
+            child = -1
+            while token_id >= 0:
+                child = self._child(node, token_id)
+                if child >= 0 or node == 0:
+                    break
+                node = self._fail[node]
+            node = child if child >= 0 else 0
+            state = node
+            while state != 0:
+                yield state, end
+                state = self._fail[state]
+
+    def match_prefixes(self, tokens: list, min_score: float = 0.0, limit: int = None) -> set:
+        """Complete every span of tokens that is a trie path, as (sentence, nature, score) tuples"""
+        results = set()
+        for node, end in self.match(tokens):
+            prefix = " ".join(tokens[end - self._depth[node] + 1:end + 1])
+            # Same length-ordered, length-bounded search as SentenceTrie._complete
+            max_length = max_completion_length(len(prefix), min_score)
+            order = itertools.count()
+            heap = [(len(prefix), next(order), prefix, node)]
+            found = 0
+            while heap:
+                length, _, current_sentence, current = heapq.heappop(heap)
+                if self._entry_start[current] < self._entry_start[current + 1]:
+                    score = completion_score(len(prefix), length)
+                    for entry in range(self._entry_start[current], self._entry_start[current + 1]):
+                        results.add((self._sentence(entry), self._nature(entry), score))
+                    found += 1
+                    if limit is not None and found >= limit:
+                        break
+                for edge in range(self._edge_start[current], self._edge_start[current + 1]):
+                    word = self._token(self._edge_token[edge])
+                    child_length = length + 1 + len(word)
+                    if child_length <= max_length:
+                        heapq.heappush(heap, (child_length, next(order), f"{current_sentence} {word}", self._edge_child[edge]))
+        return results
+
+    def vocabulary(self) -> dict:
+        """Same as SentenceTrie.vocabulary"""
+        return {self._token(token_id): count for token_id, count in Counter(self._edge_token).items()}
+
+    def entries(self):
+        """Yield (sentence, nature) for every sentence in the snapshot"""
+        for entry in range(len(self._entry_sentence)):
+            yield self._sentence(entry), self._nature(entry)
+
+    def copy(self) -> SentenceTrie:
+        """Materialize a mutable SentenceTrie with the same sentences"""
+        trie = SentenceTrie()
+        for sentence, nature in self.entries():
+            trie.insert(sentence, nature)
+        return trie
+
+def main() -> None:
+    from src import settings
+    from src.utils.spacy_util import spacy_util, lexicon_version
+    version = lexicon_version()
+    write_snapshot(spacy_util.build_trie(), settings.LEXICON_SNAPSHOT_PATH, version)
+    print(f"Wrote lexicon snapshot {version} to {settings.LEXICON_SNAPSHOT_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Cache of whole question plans: the executable SQL semantic transition produced.
+
+Entries are keyed on the normalized question and the dataset, and carry a
+version stamp of the dataset's semantic metadata (dataset fields, the models
+behind them with their dimensions and metrics, terms), read from the row counts
+and last update times of those tables. A plan whose stamp no longer matches is
+never served, which also covers changes made through other worker processes
+once the stamp is read again (at most PLAN_CACHE_VERSION_SECONDS later); the
+CRUD routers additionally drop the entries and stamps of exactly the datasets a
+change touches. Plans of relative time ranges (last month) hold while the range covers
+the same days, plans given a default partition window only on the day written.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from src import settings
+from src.dataprovider.mysql.mysql_db import execute_sql_ext, execute_sql_ext_async
+from src.utils.spacy_util import normalize_tokens
+from src.utils.time_range import covered_days
+
+# Models with a field in dataset {dataset}, an id parameter or column
+DATASET_MODELS = '''select t.model_id from model_dimension_tbl t join dataset_dimension_tbl d on t.id = d.dimension_id where d.dataset_id = {dataset}
+        union
+        select t.model_id from model_metric_tbl t join dataset_metric_tbl d on t.id = d.metric_id where d.dataset_id = {dataset}'''
+
+# Row count and last update of every table behind the fields of dataset {dataset}, one string
+FIELDS_VERSION = '''concat_ws('|',
+    (select concat(count(*), '@', coalesce(max(update_time), '')) from dataset_tbl where id = {dataset}),
+    (select concat(count(*), '@', coalesce(max(update_time), '')) from dataset_dimension_tbl where dataset_id = {dataset}),
+    (select concat(count(*), '@', coalesce(max(update_time), '')) from dataset_metric_tbl where dataset_id = {dataset}),
+    (select concat(count(*), '@', coalesce(max(update_time), '')) from model_tbl where id in ({models})),
+    (select concat(count(*), '@', coalesce(max(update_time), '')) from model_dimension_tbl where model_id in ({models})),
+    (select concat(count(*), '@', coalesce(max(update_time), '')) from model_metric_tbl where model_id in ({models})))'''
+
+TERMS_VERSION = "(select concat(count(*), '@', coalesce(max(update_time), '')) from term_tbl)"
+
+def fields_version_sql(dataset: str) -> str:
+    return FIELDS_VERSION.format(dataset=dataset, models=DATASET_MODELS.format(dataset=dataset))
+
+# A dataset's stamp: its fields' version, then that of the terms every dataset shares
+DATASET_VERSION_SQL = f"select concat({fields_version_sql(':dataset_id')}, '#', {TERMS_VERSION}) as version"
+
+# The fields version of every dataset, in one query
+FIELDS_VERSIONS_SQL = f"select s.id as dataset_id, {fields_version_sql('s.id')} as version from dataset_tbl s"
+
+# Datasets with a field of a model; foreign key dimensions make every field of the model matter to them
+MODEL_DATASETS_SQL = '''
+select d.dataset_id from dataset_dimension_tbl d join model_dimension_tbl t on t.id = d.dimension_id where t.model_id = :model_id
+union
+select d.dataset_id from dataset_metric_tbl d join model_metric_tbl t on t.id = d.metric_id where t.model_id = :model_id
+'''
+
+def fields_version(version: str) -> str:
+    """The part of a dataset's stamp that changes with its fields, models, dimensions and metrics, not with terms"""
+    return version.rsplit('#', 1)[0]
+
+def normalize_question(query: str) -> str:
+    """Questions differing only in case, spacing and punctuation share a plan"""
+    return " ".join(normalize_tokens(query))
+
+class PlanCache:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (dataset_id, question) → (version, days, written_on, sql), least recently used first
+        self._generations = {}         # dataset_id → number of invalidations, plans started before one are not stored
+        self._clears = 0
+        self._stamps = {}              # dataset_id → (monotonic time read, version), reused for PLAN_CACHE_VERSION_SECONDS
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stale": 0, "puts": 0, "evictions": 0, "invalidations": 0}
+    async def version(self, dataset_id) -> str:
+        """Current version stamp of a dataset's semantic metadata, read at most every PLAN_CACHE_VERSION_SECONDS"""
+        dataset_id = str(dataset_id)
+        with self._lock:
+            stamp = self._stamps.get(dataset_id)
+            generation = self._clears, self._generations.get(dataset_id, 0)
+        if stamp is not None and time.monotonic() - stamp[0] < settings.PLAN_CACHE_VERSION_SECONDS:
+            return stamp[1]
+        read_at = time.monotonic()
+        rows = await execute_sql_ext_async(DATASET_VERSION_SQL, {"dataset_id": dataset_id})
+        version = rows[0]['version'] if rows else ""
+        with self._lock:
+            # An invalidation during the read may have changed the metadata after it, keep asking then
+            if (self._clears, self._generations.get(dataset_id, 0)) == generation:
+                self._stamps[dataset_id] = (read_at, version)
+        return version
+    def generation(self, dataset_id) -> tuple:
+        """Invalidation count of a dataset, taken when its plan starts and handed back to put"""
+        with self._lock:
+            return self._clears, self._generations.get(str(dataset_id), 0)
+    def get(self, dataset_id, query: str, version: str, today: date = None):
+        """Cached SQL of a question, None on a miss"""
+        key = (str(dataset_id), normalize_question(query))
+        today = today or date.today()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            if entry[0] != version or entry[1] != covered_days(query, today) or entry[2] not in (None, today):
+                del self._entries[key]
+                self.counters["stale"] += 1
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry[3]
+    def put(self, dataset_id, query: str, version: str, generation: tuple, sql: str, dated: bool = False, today: date = None) -> None:
+        """Store the SQL of a question planned against version, unless the dataset was invalidated meanwhile
+
+        dated SQL holds dates computed from today beyond those the question states."""
+        key = (str(dataset_id), normalize_question(query))
+        today = today or date.today()
+        entry = (version, covered_days(query, today), today if dated else None, sql)
+        with self._lock:
+            if (self._clears, self._generations.get(key[0], 0)) != generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.counters["puts"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+    def invalidate_dataset(self, dataset_id) -> None:
+        """Drop the plans of a dataset whose fields changed"""
+        dataset_id = str(dataset_id)
+        with self._lock:
+            self._generations[dataset_id] = self._generations.get(dataset_id, 0) + 1
+            self._stamps.pop(dataset_id, None)
+            for key in [key for key in self._entries if key[0] == dataset_id]:
+                del self._entries[key]
+            self.counters["invalidations"] += 1
+    def invalidate_model(self, model_id) -> None:
+        """Drop the plans of every dataset using a model whose table, dimensions or metrics changed"""
+        for row in execute_sql_ext(MODEL_DATASETS_SQL, {"model_id": model_id}):
+            self.invalidate_dataset(row['dataset_id'])
+    def clear(self) -> None:
+        """Drop every plan, for changes shared by all datasets such as terms"""
+        with self._lock:
+            self._clears += 1
+            self._entries.clear()
+            self._stamps.clear()
+            self.counters["invalidations"] += 1
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {**self.counters, "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+                    "entries": len(self._entries), "max_entries": self.max_entries}
+
+plan_cache = PlanCache(settings.PLAN_CACHE_MAX_ENTRIES)
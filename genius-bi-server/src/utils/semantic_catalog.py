@@ -0,0 +1,139 @@
+"""
+Versioned in-memory catalog of the semantic metadata: models, their dimensions and
+metrics, the fields of every dataset, and what is derived from them (join graphs,
+partition time fields).
+
+A catalog is immutable once built. It is loaded in bulk with a handful of
+queries and replaced as a whole, so a question always sees one consistent
+version and its nodes resolve fields without database round trips. A catalog
+remembers the fields version of every dataset at load time, read in the same
+single query for all of them; a question whose plan cache stamp has another one
+(a change made through any worker process) or a CRUD change made through this
+one reloads it. Terms are not part of the catalog, editing them reloads nothing.
+"""
+import asyncio
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from src.dataprovider.mysql.mysql_db import execute_sql_ext_async
+from src.models.nature import Nature, NatureKind
+from src.utils.join_planner import JoinGraph
+from src.utils.plan_cache import FIELDS_VERSIONS_SQL, fields_version
+
+# dimension_type of special dimensions: a join to the table in express, and the column a model's table is partitioned on
+FOREIGN_KEY_DIMENSION_TYPE = 'foreign key'
+PARTITION_DIMENSION_TYPE = 'partition time'
+# metric_type of metrics that are a plain column, summed or averaged as is; derived ones compute their own in express
+ATOM_METRIC_TYPE = 'atom'
+
+MODELS_SQL = "select id, table_name from model_tbl"
+DIMENSIONS_SQL = "select id, model_id, name, alias, dimension_type as field_type, express from model_dimension_tbl"
+METRICS_SQL = "select id, model_id, name, alias, metric_type as field_type, express from model_metric_tbl"
+DATASET_FIELDS_SQL = '''
+select dataset_id, dimension_id as field_id, 1 as kind from dataset_dimension_tbl
+union all
+select dataset_id, metric_id as field_id, 2 as kind from dataset_metric_tbl
+'''
+
+@dataclass(frozen=True, slots=True)
+class SemanticField:
+    """A model dimension or metric with the table it is a column of"""
+    nature: Nature
+    alias: str
+    name: str         # Column name in table_name
+    field_type: str   # dimension_type or metric_type
+    express: str
+    table_name: str
+
+class SemanticCatalog:
+    def __init__(self, version: int, stamps: dict, models: dict, dimensions: list, metrics: list, dataset_fields: list) -> None:
+        self.version = version                        # Number of catalogs loaded by this process
+        self.stamps = MappingProxyType(stamps)        # dataset_id → fields version when loaded
+        self.models = MappingProxyType(models)        # model_id → table name
+        fields = {}
+        for row, kind in [*((row, NatureKind.DIMENSION) for row in dimensions), *((row, NatureKind.METRIC) for row in metrics)]:
+            nature = Nature.of(kind, row['model_id'], row['id'])
+            fields[nature] = SemanticField(nature, row['alias'] or '', row['name'], row['field_type'] or '', row['express'] or '',
+                                           models.get(int(row['model_id']), ''))
+        self.fields = MappingProxyType(fields)        # Nature → SemanticField
+        by_id = {(nature.kind, nature.field_id): nature for nature in fields}
+        datasets = {}
+        for row in dataset_fields:
+            nature = by_id.get((NatureKind(int(row['kind'])), int(row['field_id'])))
+            if nature is not None:
+                datasets.setdefault(str(row['dataset_id']), set()).add(nature)
+        self.datasets = MappingProxyType({dataset_id: frozenset(natures) for dataset_id, natures in datasets.items()})  # dataset_id → its fields
+        # Derived per dataset up front, nothing is computed once the catalog is shared
+        model_dimensions = {}
+        for field in fields.values():
+            if field.nature.is_dimension:
+                model_dimensions.setdefault(field.nature.model_id, []).append(field)
+        join_graphs = {}
+        partitions = {}
+        for dataset_id, natures in self.datasets.items():
+            model_fields = [field for model_id in sorted({nature.model_id for nature in natures})
+                            for field in model_dimensions.get(model_id, ())]
+            join_graphs[dataset_id] = JoinGraph([{"table_name": field.table_name, "field_name": field.name, "express": field.express}
+                                                 for field in model_fields if field.field_type == FOREIGN_KEY_DIMENSION_TYPE])
+            partitions[dataset_id] = MappingProxyType({field.alias: field.nature for field in model_fields
+                                                       if field.field_type == PARTITION_DIMENSION_TYPE})
+        self._join_graphs = MappingProxyType(join_graphs)
+        self._partitions = MappingProxyType(partitions)
+    def field(self, nature: Nature):
+        """The dimension or metric a mapped alias refers to, None when it no longer exists"""
+        return self.fields.get(nature)
+    def join_graph(self, dataset_id) -> JoinGraph:
+        """Foreign key joins between the tables of the dataset's models"""
+        return self._join_graphs.get(str(dataset_id)) or JoinGraph([])
+    def partition_fields(self, dataset_id, model_ids) -> dict:
+        """Partition time field alias → Nature, of the dataset's models among model_ids"""
+        partitions = self._partitions.get(str(dataset_id), {})
+        return {alias: nature for alias, nature in partitions.items() if nature.model_id in model_ids}
+
+class SemanticCatalogRegistry:
+    def __init__(self) -> None:
+        self._catalog = None
+        self._generation = 0   # Bumped by invalidate, so a load racing a change is never kept
+        self._loads = 0
+        self._lock = threading.Lock()
+        self._load_lock = None
+    async def get(self, dataset_id=None, stamp: str = None) -> SemanticCatalog:
+        """Current catalog, reloaded first when stamp (plan_cache.version of dataset_id) shows it is out of date"""
+        catalog = self._catalog
+        if self._current(catalog, dataset_id, stamp):
+            return catalog
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            # Concurrent questions wait for one load
+            catalog = self._catalog
+            if self._current(catalog, dataset_id, stamp):
+                return catalog
+            return await self._load()
+    @staticmethod
+    def _current(catalog, dataset_id, stamp) -> bool:
+        return catalog is not None and (stamp is None or catalog.stamps.get(str(dataset_id)) == fields_version(stamp))
+    async def _load(self) -> SemanticCatalog:
+        generation = self._generation
+        # Versions first: a change landing during the load leaves them older than the data, costing one more load
+        versions = await execute_sql_ext_async(FIELDS_VERSIONS_SQL, None)
+        models, dimensions, metrics, dataset_fields = await asyncio.gather(
+            execute_sql_ext_async(MODELS_SQL, None),
+            execute_sql_ext_async(DIMENSIONS_SQL, None),
+            execute_sql_ext_async(METRICS_SQL, None),
+            execute_sql_ext_async(DATASET_FIELDS_SQL, None))
+        with self._lock:
+            self._loads += 1
+            catalog = SemanticCatalog(self._loads, {str(row['dataset_id']): row['version'] for row in versions},
+                                      {int(row['id']): row['table_name'] for row in models}, dimensions, metrics, dataset_fields)
+            if generation == self._generation:
+                self._catalog = catalog
+        return catalog
+    def invalidate(self) -> None:
+        """Drop the catalog after models, fields or datasets changed, the next question loads a new one"""
+        with self._lock:
+            self._generation += 1
+            self._catalog = None
+
+semantic_catalog = SemanticCatalogRegistry()
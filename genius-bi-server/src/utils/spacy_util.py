@@ -2,41 +2,187 @@
 import spacy
 from spacy.tokenizer import Tokenizer
 from spacy.util import compile_infix_regex, compile_prefix_regex, compile_suffix_regex
-from src.dataprovider.mysql.mysql_db import execute_sql
+from src.dataprovider.mysql.mysql_db import execute_sql_ext, execute_sql_ext_async
 from sqlalchemy.orm import Session
+from src.models.nature import Nature, NatureKind
 from src.models.word_with_nature import WordWithNature
-import difflib
+from src.utils.typo_index import TypoIndex
+from src import settings
+import asyncio
+import functools
+import heapq
+import itertools
+import math
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import Counter, deque
 
-def edit_distance_lib(s1, s2):
-    return difflib.SequenceMatcher(None, s1, s2).ratio()
+# Decimal numbers stay whole ("3.5"), everything else splits on punctuation and whitespace,
+# the same word boundaries spaCy's tokenizer produces for aliases once punctuation is dropped
+TOKEN_PATTERN = re.compile(r"\d+(?:[.,]\d+)+|\w+")
+
+SPACY_MODEL = "en_core_web_sm"
+# Matching only needs the tokenizer, so none of the statistical components are loaded
+SPACY_EXCLUDE = ["tok2vec", "tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"]
+
+@functools.lru_cache(maxsize=None)
+def get_nlp():
+    """Load the one spaCy pipeline shared by the whole process"""
+    nlp = spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDE)
+    # Modify tokenizer's infix rules (handle hyphens, abbreviations, etc.)
+    infixes = list(nlp.Defaults.infixes) + [r'(?<=[a-zA-Z])-(?=[a-zA-Z])']  # Allow "state-of-the-art" as a whole
+    infix_regex = compile_infix_regex(infixes)
+    nlp.tokenizer.infix_finditer = infix_regex.finditer
+    return nlp
+
+def completion_score(prefix_length: int, sentence_length: int) -> float:
+    """difflib ratio between a prefix and a sentence that starts with it: 2p / (p + len)"""
+    return 2 * prefix_length / (prefix_length + sentence_length)
+
+def max_completion_length(prefix_length: int, min_score: float) -> float:
+    """Longest sentence extending a prefix that can still reach min_score"""
+    if min_score <= 0:
+        return math.inf
+    return prefix_length * (2 - min_score) / min_score + 1e-9
+
+def normalize_tokens(text: str) -> list:
+    """Split text into lowercased, punctuation free word tokens"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text).casefold())
 
 class TrieNode:
-    def __init__(self, word=None, pos=None):
+    __slots__ = ("word", "entries", "children", "depth", "fail")
+    def __init__(self, word=None, depth=0):
         self.word = word      # Current word
-        self.pos = pos        # POS tag for this word
+        self.entries = ()     # (sentence, nature) of every alias ending at this word
         self.children = {}    # Next words: word → TrieNode
-        self.is_end = False   # Marks end of a sentence
+        self.depth = depth    # Number of words from the root
+        self.fail = None      # Aho-Corasick failure link: longest proper suffix that is also a trie path
         
 class SentenceTrie:
     def __init__(self):
         self.root = TrieNode()
-        self.nlp = spacy.load("en_core_web_sm")
-    def insert(self, sentence: str, nature: str):
+        self._compiled = False
+    def tokenize(self, text: str) -> list:
+        """Split text into the word tokens stored in the trie"""
+        return normalize_tokens(text)
+    def insert(self, sentence: str, nature: Nature):
         """Insert a sentence into the trie"""
-        doc = self.nlp(sentence)
-
-        tokens = [(token.text, token.pos_) for token in doc if not token.is_punct]
+        tokens = self.tokenize(sentence)
+        if not tokens:
+            return
         
         node = self.root
-        for word, pos in tokens:
+        for word in tokens:
             if word not in node.children:
-                node.children[word] = TrieNode(word, nature)
+                node.children[sys.intern(word)] = TrieNode(sys.intern(word), node.depth + 1)
             node = node.children[word]
-        node.is_end = True
-    def search_prefix(self, prefix):
+        if (sentence, nature) not in node.entries:
+            node.entries = node.entries + ((sentence, nature),)
+        self._compiled = False
+    def delete(self, sentence: str, nature: Nature):
+        """Remove a sentence from the trie, pruning words no other sentence uses"""
+        path = [self.root]
+        for word in self.tokenize(sentence):
+            if word not in path[-1].children:
+                return
+            path.append(path[-1].children[word])
+        node = path[-1]
+        if node is self.root or (sentence, nature) not in node.entries:
+            return
+        node.entries = tuple(entry for entry in node.entries if entry != (sentence, nature))
+        while len(path) > 1 and not node.entries and not node.children:
+            path.pop()
+            del path[-1].children[node.word]
+            node = path[-1]
+        self._compiled = False
+    def rename(self, old_sentence: str, new_sentence: str, nature: Nature):
+        """Move nature from old_sentence to new_sentence"""
+        self.delete(old_sentence, nature)
+        self.insert(new_sentence, nature)
+    def copy(self) -> "SentenceTrie":
+        """Clone the trie so it can be modified while readers keep using this one"""
+        trie = SentenceTrie()
+        stack = [(self.root, trie.root)]
+        while stack:
+            source, target = stack.pop()
+            target.entries = source.entries
+            for word, child in source.children.items():
+                target.children[word] = TrieNode(word, child.depth)
+                stack.append((child, target.children[word]))
+        return trie
+    def entries(self):
+        """Yield (sentence, nature) for every sentence in the trie"""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            yield from node.entries
+            stack.extend(node.children.values())
+    def vocabulary(self) -> Counter:
+        """word → number of trie edges labelled with it, i.e. how many alias paths use the word"""
+        counts = Counter()
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            counts.update(node.children.keys())
+            stack.extend(node.children.values())
+        return counts
+    def compile(self):
+        """Build the Aho-Corasick failure links (breadth first, parents before children)"""
+        self.root.fail = self.root
+        queue = deque()
+        for child in self.root.children.values():
+            child.fail = self.root
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for word, child in node.children.items():
+                fail = node.fail
+                while fail is not self.root and word not in fail.children:
+                    fail = fail.fail
+                child.fail = fail.children.get(word, self.root)
+                queue.append(child)
+        self._compiled = True
+    def match(self, tokens: list):
+        """Scan tokens once, yielding (node, end) for every span tokens[end - node.depth + 1:end + 1] that is a trie path"""
+        if not self._compiled:
+            self.compile()
+        node = self.root
+        for end, word in enumerate(tokens):
+            while node is not self.root and word not in node.children:
+                node = node.fail
+            node = node.children.get(word, self.root)
+            # Every suffix of the scanned text that is also a trie path hangs off the failure chain
+            state = node
+            while state is not self.root:
+                yield state, end
+                state = state.fail
+    def has_path(self, tokens: list) -> bool:
+        """Whether tokens are the first words of an alias"""
+        node = self.root
+        for word in tokens:
+            node = node.children.get(word)
+            if node is None:
+                return False
+        return True
+    def match_prefixes(self, tokens: list, min_score: float = 0.0, limit: int = None) -> set:
+        """Complete every span of tokens that is a trie path, as (sentence, nature, score) tuples"""
+        # One Aho-Corasick pass reports every span that is a trie path, no per-span parsing
+        results = set()
+        for node, end in self.match(tokens):
+            prefix = " ".join(tokens[end - node.depth + 1:end + 1])
+            results.update(self._complete(node, prefix, [], min_score, limit))
+        return results
+    def search_prefix(self, prefix, min_score: float = 0.0, limit: int = None):
         """Find all sentences starting with given prefix"""
-        doc = self.nlp(prefix)
-        tokens = [token.text for token in doc if not token.is_punct]
+        tokens = self.tokenize(prefix)
+        if not tokens:
+            return []
+        prefix = " ".join(tokens)
         
         # Traverse to the end of the prefix
         node = self.root
@@ -46,16 +192,29 @@ class SentenceTrie:
             node = node.children[word]
         
         # Collect all sentences starting from this node
-        return self._dfs(node, prefix, [], prefix)
+        return self._complete(node, prefix, [], min_score, limit)
     
-    def _dfs(self, node, current_sentence, results, prefix):
-        """Depth-first search to collect complete sentences"""
-        if node.is_end:
-            results.append((current_sentence, node.pos, edit_distance_lib(prefix, current_sentence)))
-        
-        for child_word, child_node in node.children.items():
-            new_sentence = f"{current_sentence} {child_word}"
-            self._dfs(child_node, new_sentence, results, prefix)
+    def _complete(self, node, prefix, results, min_score=0.0, limit=None):
+        """Collect complete sentences below node, best scoring (shortest) first"""
+        # Every sentence below node extends prefix, so its score only depends on its length and drops as it grows:
+        # branches longer than min_score allows are never walked, and the search stops after limit sentences
+        max_length = max_completion_length(len(prefix), min_score)
+        order = itertools.count()
+        heap = [(len(prefix), next(order), prefix, node)]
+        found = 0
+        while heap:
+            length, _, current_sentence, current = heapq.heappop(heap)
+            if current.entries:
+                score = completion_score(len(prefix), length)
+                for sentence, nature in current.entries:
+                    results.append((sentence, nature, score))
+                found += 1
+                if limit is not None and found >= limit:
+                    break
+            for child_word, child_node in current.children.items():
+                child_length = length + 1 + len(child_word)
+                if child_length <= max_length:
+                    heapq.heappush(heap, (child_length, next(order), f"{current_sentence} {child_word}", child_node))
             
         return results
 
@@ -65,62 +224,316 @@ class SentenceTrie:
             node = self.root
             
         indent = "    " * level
-        node_info = f"{node.word} ({node.pos})" if node.word else "ROOT"
+        node_info = f"{node.word} {[nature for _, nature in node.entries]}" if node.word else "ROOT"
         print(f"{indent}{node_info}")
         
         for child_word, child_node in node.children.items():
             self.visualize(child_node, level + 1, prefix + child_word)
 
-class SpacyUtil:
-    def __init__(self) -> None:
-        sql = '''
+LEXICON_SQL = '''
                 select alias as word, concat('_',model_id,'_',id,'_','dimension') as nature from model_dimension_tbl 
                 union 
                 select alias as word, concat('_',model_id,'_',id,'_','metric') as nature from model_metric_tbl
                 union 
                 select synonym as word, concat('_',id,'_','term') as nature from term_tbl
               '''
-        wordWithNatures = execute_sql(sql, '', WordWithNature)
 
-        self.nlp = spacy.load("en_core_web_sm")
-        
-        # Add special tokenization rules (ensure custom terms are not split)
-        self.word_dict = {}
-        self.prefix_trie = SentenceTrie()
-        for term in wordWithNatures:
-            self.word_dict[term.word] = term.nature
-            self.prefix_trie.insert(term.word, term.nature)
+# Changes whenever a row of the lexicon tables is inserted, updated or deleted
+LEXICON_VERSION_SQL = '''
+                select concat_ws('|',
+                  (select concat(count(*),':',coalesce(max(id),0),':',coalesce(max(update_time),'')) from model_dimension_tbl),
+                  (select concat(count(*),':',coalesce(max(id),0),':',coalesce(max(update_time),'')) from model_metric_tbl),
+                  (select concat(count(*),':',coalesce(max(id),0),':',coalesce(max(update_time),'')) from term_tbl)
+                ) as version
+              '''
+
+DATASET_FIELDS_SQL = '''
+                select dimension_id as field_id, 'dimension' as kind from dataset_dimension_tbl where dataset_id = :dataset_id
+                union
+                select metric_id as field_id, 'metric' as kind from dataset_metric_tbl where dataset_id = :dataset_id
+              '''
+
+def lexicon_version() -> str:
+    """Stamp of the metadata tables the lexicon is built from"""
+    return execute_sql_ext(LEXICON_VERSION_SQL, None)[0]['version']
+
+class Lexicon:
+    """Immutable view of the alias lexicon, replaced as a whole whenever an alias changes"""
+    def __init__(self, prefix_trie, version: int, stamp: str = None) -> None:
+        self.prefix_trie = prefix_trie  # SentenceTrie, or a CompiledTrie mapped from the snapshot file
+        self.version = version
+        self.stamp = stamp              # lexicon_version() its aliases match
+        self.dataset_tries = {}  # dataset_id → (generation, fields version, SentenceTrie of that dataset's aliases, its TypoIndex)
+        self.dataset_rows = {}   # dataset_id → (dataset trie, rows of alias_vectors holding that dataset's aliases)
+    @functools.cached_property
+    def field_entries(self) -> dict:
+        """(kind, field_id) → [(sentence, nature)], so dataset tries are built without a full scan"""
+        ret = {}
+        for sentence, nature in self.prefix_trie.entries():
+            ret.setdefault((nature.kind, nature.field_id), []).append((sentence, nature))
+        return ret
+    @functools.cached_property
+    def typo_index(self) -> TypoIndex:
+        """Misspelling lookup over every word of every alias"""
+        return TypoIndex(self.prefix_trie.vocabulary())
+    @functools.cached_property
+    def alias_vectors(self):
+        """AliasVectors of every alias, None unless a vectors model is configured"""
+        model = settings.ALIAS_VECTORS_MODEL
+        if not model:
+            return None
+        from src.utils.alias_vectors import AliasVectors
+        path = settings.ALIAS_VECTORS_PATH
+        entries = list(self.prefix_trie.entries())
+        alias_vectors = AliasVectors.open_if_current(path, model, entries) if path else None
+        if alias_vectors is None:
+            alias_vectors = AliasVectors.build(model, entries)
+            if path:
+                try:
+                    alias_vectors.save(path)
+                except OSError as e:
+                    print(f"Alias vectors {path} not written: {e}")
+        return alias_vectors
+    @functools.cached_property
+    def word_dict(self) -> dict:
+        return {word: nature for word, nature in self.prefix_trie.entries()}
+    @functools.cached_property
+    def tokenizer(self) -> Tokenizer:
+        """Tokenizer with every alias registered as a special case (ensure custom terms are not split)"""
+        nlp = get_nlp()
+        tokenizer = Tokenizer(nlp.vocab)
+        tokenizer.from_bytes(nlp.tokenizer.to_bytes())
+        # A single rules assignment reloads the special-case table once, add_special_case would reload it per alias
+        rules = dict(tokenizer.rules)
+        for word in self.word_dict:
             # Convert terms to spaCy Token format
-            self.nlp.tokenizer.add_special_case(term.word, [{"ORTH": term.word}])
-        # Modify tokenizer's infix rules (handle hyphens, abbreviations, etc.)
-        infixes = list(self.nlp.Defaults.infixes) + [r'(?<=[a-zA-Z])-(?=[a-zA-Z])']  # Allow "state-of-the-art" as a whole
-        infix_regex = compile_infix_regex(infixes)
-        self.nlp.tokenizer.infix_finditer = infix_regex.finditer
-    def prefix_match_words(self, text: str) -> list:
-        words = text.split()
-        # enumerate all substring
-        all_combinations = []
-        for start in range(len(words)):
-            for end in range(start + 1, len(words) + 1):
-                phrase = " ".join(words[start:end])
-                all_combinations.append(phrase)
-        results = []
-        for i, phrase in enumerate(all_combinations, 1):
-            results = results + self.prefix_trie.search_prefix(phrase)
-        results = list(set(results))
+            rules[word] = [{"ORTH": word}]
+        tokenizer.rules = rules
+        return tokenizer
 
-        return results
+class SpacyUtil:
+    def __init__(self) -> None:
+        # Loaded on first use; readers grab self._lexicon once and never see it change underneath them
+        self._lexicon = None
+        self._lock = threading.Lock()
+        # Bumped whenever a dataset's fields change, so a build racing the change is never cached as current
+        self._dataset_generations = {}
+        self._checked_at = 0.0  # time.monotonic() of the last lexicon_version() check
+        self._checked_async = False  # Set once check_lexicon runs, the property then leaves the checks to it
+    @property
+    def nlp(self):
+        return get_nlp()
+    @property
+    def lexicon(self) -> Lexicon:
+        lexicon = self._lexicon
+        if lexicon is None:
+            self.load()
+            return self._lexicon
+        now = time.monotonic()
+        if not self._checked_async and now - self._checked_at >= settings.LEXICON_CHECK_SECONDS:
+            self._checked_at = now
+            # Aliases changed through another worker, which rebuilt the snapshot: map the new one
+            version = lexicon_version()
+            if version != lexicon.stamp:
+                self.load(version)
+                return self._lexicon
+        return lexicon
+    async def check_lexicon(self) -> None:
+        """The lexicon property's stamp check for the event loop: the stamp is read asynchronously and only
+        a changed lexicon is loaded, in a thread. From the first call on the property no longer checks,
+        so matching in a worker thread never reads the database."""
+        self._checked_async = True
+        lexicon = self._lexicon
+        now = time.monotonic()
+        if lexicon is not None and now - self._checked_at < settings.LEXICON_CHECK_SECONDS:
+            return
+        self._checked_at = now
+        rows = await execute_sql_ext_async(LEXICON_VERSION_SQL, None)
+        if lexicon is None or rows[0]['version'] != lexicon.stamp:
+            await asyncio.to_thread(self.load, rows[0]['version'])
+    def build_trie(self) -> SentenceTrie:
+        """Build a trie of every alias in the metadata tables"""
+        prefix_trie = SentenceTrie()
+        for row in execute_sql_ext(LEXICON_SQL, None):
+            if row['word']:
+                prefix_trie.insert(row['word'], Nature.parse(row['nature']))
+        prefix_trie.compile()
+        return prefix_trie
+    def load(self, seen_version: str = None) -> None:
+        """(Re)load the whole lexicon, from the shared snapshot file when it matches the metadata tables
+
+        With seen_version (a lexicon_version() the caller read), nothing is done when the lexicon is already at it."""
+        from src.utils.lexicon_snapshot import CompiledTrie
+        with self._lock:
+            if seen_version is not None and self._lexicon is not None and self._lexicon.stamp == seen_version:
+                return
+            version = lexicon_version()
+            path = settings.LEXICON_SNAPSHOT_PATH
+            if not path:
+                self._publish(self.build_trie(), stamp=version)
+                return
+            prefix_trie = CompiledTrie.open_if_current(path, version)
+            if prefix_trie is None:
+                prefix_trie = self._write_snapshot(self.build_trie(), version)
+            self._publish(prefix_trie, stamp=version)
+    def _write_snapshot(self, prefix_trie: SentenceTrie, version: str):
+        """Share a trie with the other workers as the snapshot of version, mapped back; the trie itself if that fails"""
+        from src.utils.lexicon_snapshot import CompiledTrie, write_snapshot
+        path = settings.LEXICON_SNAPSHOT_PATH
+        if not path:
+            return prefix_trie
+        try:
+            write_snapshot(prefix_trie, path, version)
+            return CompiledTrie(path)
+        except OSError as e:
+            print(f"Lexicon snapshot {path} not written: {e}")
+            return prefix_trie
+    def warm_up(self) -> None:
+        """Load the lexicon and build its lookup indexes ahead of the first question"""
+        self.load()
+        lexicon = self.lexicon
+        # Cached properties, built on first access
+        lexicon.typo_index
+        lexicon.alias_vectors
+    def insert_words(self, words: list) -> None:
+        self.update_words(inserted=words)
+    def delete_words(self, words: list) -> None:
+        self.update_words(deleted=words)
+    def rename_word(self, old: WordWithNature, new: WordWithNature) -> None:
+        self.update_words(deleted=[old], inserted=[new])
+    def update_words(self, deleted: list = (), inserted: list = ()) -> None:
+        """Apply alias changes, already committed, to a copy of the lexicon and swap it in
+
+        The copy is stamped with the lexicon_version() after the change and written as the shared snapshot,
+        so neither this worker nor the others rebuild the whole lexicon for it."""
+        with self._lock:
+            if self._lexicon is None:
+                # Nothing loaded yet, the first load reads the committed rows anyway
+                return
+            # A mapped snapshot copies into a regular trie, mapped again once written
+            previous = self._lexicon
+            prefix_trie = previous.prefix_trie.copy()
+            for term in deleted:
+                if term.word:
+                    prefix_trie.delete(term.word, term.nature)
+            for term in inserted:
+                if term.word:
+                    prefix_trie.insert(term.word, term.nature)
+            prefix_trie.compile()
+            version = lexicon_version()
+            prefix_trie = self._write_snapshot(prefix_trie, version)
+            # Only the changed aliases are embedded again, when the previous lexicon had its vectors
+            alias_vectors = previous.__dict__.get("alias_vectors")
+            if alias_vectors is not None:
+                alias_vectors = alias_vectors.updated(deleted, inserted)
+                path = settings.ALIAS_VECTORS_PATH
+                if path:
+                    try:
+                        alias_vectors.save(path)
+                    except OSError as e:
+                        print(f"Alias vectors {path} not written: {e}")
+            self._publish(prefix_trie, alias_vectors, version)
+    def _publish(self, prefix_trie, alias_vectors=None, stamp: str = None) -> None:
+        # Tries are compiled before the swap so readers never mutate a shared one
+        version = self._lexicon.version + 1 if self._lexicon is not None else 1
+        lexicon = Lexicon(prefix_trie, version, stamp)
+        if alias_vectors is not None:
+            lexicon.alias_vectors = alias_vectors
+        self._lexicon = lexicon
+        self._checked_at = time.monotonic()
+    def dataset_trie(self, dataset_id, fields_version: str = None, fields=None) -> SentenceTrie:
+        """Trie restricted to the dimension and metric aliases of one dataset, built on first use"""
+        return self._dataset_index(dataset_id, fields_version, fields)[0]
+    def _dataset_index(self, dataset_id, fields_version: str = None, fields=None) -> tuple:
+        """(trie, typo index) of one dataset's aliases, cached on the current lexicon
+
+        fields_version is the dataset's plan_cache.fields_version(), a cached index built at another one is
+        rebuilt, so fields changed through other workers are picked up; without it only local changes are.
+        fields, the dataset's Natures at that version (SemanticCatalog.datasets), spare the database read."""
+        lexicon = self.lexicon
+        generation = self._dataset_generations.get(dataset_id, 0)
+        cached = lexicon.dataset_tries.get(dataset_id)
+        if cached is not None and cached[0] == generation and (fields_version is None or cached[1] == fields_version):
+            return cached[2:]
+
+        if fields is None:
+            keys = [(NatureKind[item['kind'].upper()], item['field_id'])
+                    for item in execute_sql_ext(DATASET_FIELDS_SQL, {"dataset_id": dataset_id})]
+        else:
+            keys = [(nature.kind, nature.field_id) for nature in fields]
+        prefix_trie = SentenceTrie()
+        for key in keys:
+            for sentence, nature in lexicon.field_entries.get(key, ()):
+                prefix_trie.insert(sentence, nature)
+        prefix_trie.compile()
+        typo_index = TypoIndex(prefix_trie.vocabulary())
+        lexicon.dataset_tries[dataset_id] = (generation, fields_version, prefix_trie, typo_index)
+        return prefix_trie, typo_index
+    def invalidate_dataset(self, dataset_id) -> None:
+        """Drop the cached trie of a dataset whose fields changed"""
+        with self._lock:
+            self._dataset_generations[dataset_id] = self._dataset_generations.get(dataset_id, 0) + 1
+            if self._lexicon is not None:
+                self._lexicon.dataset_tries.pop(dataset_id, None)
+                self._lexicon.dataset_rows.pop(dataset_id, None)
+    def prefix_match_words(self, text: str, dataset_id=None, min_score: float = 0.0, limit: int = None,
+                           fields_version: str = None, fields=None) -> list:
+        """Find every alias that starts with a word span of text, as (phrase, nature, score) tuples
+
+        With a dataset_id only that dataset's dimensions and metrics are matched, as of its fields_version
+        and taken from fields when given. Aliases scoring below
+        min_score are skipped and each span is completed to at most limit aliases. Misspelt words
+        ("totl", "transcation") are first corrected to the closest word the aliases use."""
+        if dataset_id is None:
+            lexicon = self.lexicon
+            prefix_trie, typo_index = lexicon.prefix_trie, lexicon.typo_index
+        else:
+            prefix_trie, typo_index = self._dataset_index(dataset_id, fields_version, fields)
+        tokens = typo_index.correct(prefix_trie.tokenize(text), prefix_trie)
+        return list(prefix_trie.match_prefixes(tokens, min_score, limit))
+    def semantic_match_words(self, text: str, dataset_id=None, min_score: float = 0.0, max_words: int = 4,
+                             fields_version: str = None, fields=None) -> list:
+        """Find the alias closest in meaning to each span of up to max_words words of text, as (phrase, nature, score) tuples
+
+        Returns nothing unless settings.ALIAS_VECTORS_MODEL is set. With a dataset_id only that
+        dataset's dimensions and metrics are matched, as of its fields_version and taken from fields when given."""
+        lexicon = self.lexicon
+        alias_vectors = lexicon.alias_vectors
+        if alias_vectors is None:
+            return []
+        if dataset_id is None:
+            prefix_trie, typo_index = lexicon.prefix_trie, lexicon.typo_index
+            rows = None
+        else:
+            prefix_trie, typo_index = self._dataset_index(dataset_id, fields_version, fields)
+            # Rows follow the dataset trie, rebuilt whenever it is
+            cached = lexicon.dataset_rows.get(dataset_id)
+            if cached is not None and cached[0] is prefix_trie:
+                rows = cached[1]
+            else:
+                rows = alias_vectors.rows_of({nature for _, nature in prefix_trie.entries()})
+                lexicon.dataset_rows[dataset_id] = (prefix_trie, rows)
+        from src.utils.alias_vectors import question_spans
+        tokens = typo_index.correct(prefix_trie.tokenize(text), prefix_trie)
+        spans = question_spans(tokens, max_words)
+        # Every span is embedded and scored in one batch, keeping the best span per alias
+        best = {}
+        for _, sentence, nature, score in alias_vectors.search(spans, 1, min_score, rows):
+            if score > best.get((sentence, nature), 0.0):
+                best[(sentence, nature)] = score
+        return [(sentence, nature, score) for (sentence, nature), score in best.items()]
     def suffix_match_words(self, text:str) -> None:
         pass 
-    def tokenize(self, text) -> dict[str,str]:
+    def tokenize(self, text) -> dict[str,Nature]:
         ret = {}
 
-        doc = self.nlp(text)
+        lexicon = self.lexicon
+        doc = lexicon.tokenizer(text)
         # Override POS tags (if matched in custom dictionary)
         for token in doc:
-            if token.text in self.word_dict:
-                token.tag_ = self.word_dict[token.text]
-                ret[token.text] = token.tag_
+            if token.text in lexicon.word_dict:
+                token.tag_ = str(lexicon.word_dict[token.text])
+                ret[token.text] = lexicon.word_dict[token.text]
 
         return ret
 
@@ -131,4 +544,4 @@ spacy_util = SpacyUtil()
 #    print(item)
 #doc = spacy_util.tokenize(text)
 #for token, pos in doc.items():
-#    print(f"Text: {token} POS: {pos}")
\ No newline at end of file
+#    print(f"Text: {token} POS: {pos}")
@@ -0,0 +1,131 @@
+"""
+Rewrites of the backticked SQL the parsing stages produce, from alias SQL to SQL on the models' tables.
+
+Statements are parsed with sqlglot (mysql dialect) once: parses are kept in a
+small LRU keyed on the SQL text, which validation, semantic transition and
+anything reading the final SQL share. Rewrites work on a copy of the tree and
+touch only the nodes they change, in a single traversal, so their cost follows
+the size of the SQL rather than the number of aliases a dataset has.
+"""
+import threading
+from collections import OrderedDict
+
+import sqlglot
+from sqlglot import exp
+
+MAX_PARSED = 1024
+
+_parsed = OrderedDict()  # SQL → tuple of statements, least recently used first
+_lock = threading.Lock()
+
+def parse_statements(sql: str) -> tuple:
+    """Statements of sql, shared between callers: copy before changing them
+
+    Raises sqlglot's ParseError on invalid SQL."""
+    with _lock:
+        statements = _parsed.get(sql)
+        if statements is not None:
+            _parsed.move_to_end(sql)
+            return statements
+    statements = tuple(statement for statement in sqlglot.parse(sql, read="mysql") if statement is not None)
+    remember(sql, statements)
+    return statements
+
+def remember(sql: str, statements: tuple) -> None:
+    """Cache the statements sql parses to, e.g. the tree a rewrite rendered it from"""
+    with _lock:
+        _parsed[sql] = statements
+        _parsed.move_to_end(sql)
+        while len(_parsed) > MAX_PARSED:
+            _parsed.popitem(last=False)
+
+def parse_sql(sql: str):
+    """A private copy of the single statement of sql, None when it is not exactly one"""
+    statements = parse_statements(sql)
+    return statements[0].copy() if len(statements) == 1 else None
+
+# Comparison of column op literal, as the same bound read the other way round
+FLIPPED = {exp.GT: exp.LT, exp.GTE: exp.LTE, exp.LT: exp.GT, exp.LTE: exp.GTE}
+
+def _time_bounds(where, time_fields: set) -> tuple:
+    """Widest (lower, upper) string bounds the where puts on any of time_fields, None for a missing one"""
+    lower = upper = None
+    for node in where.find_all(exp.GT, exp.GTE, exp.LT, exp.LTE):
+        kind, column, literal = type(node), node.this, node.expression
+        if isinstance(literal, exp.Column):
+            kind, column, literal = FLIPPED[kind], literal, column
+        if not isinstance(column, exp.Column) or column.name not in time_fields \
+                or not isinstance(literal, exp.Literal) or not literal.is_string:
+            continue
+        if kind in (exp.GT, exp.GTE):
+            lower = literal.this if lower is None else min(lower, literal.this)
+        else:
+            upper = literal.this if upper is None else max(upper, literal.this)
+    return lower, upper
+
+def add_partition_filter(tree, table_name: str, field: str, time_fields: set, ranges: list, window_start: str) -> bool:
+    """Bound every select reading table_name on its partition field, tell whether the default window was used
+
+    A select with a condition on field is left as is. One filtering any of time_fields gets the same
+    bounds on field, otherwise the question's stated ranges (TimeRange) are used; only a select with
+    neither reads the window from window_start on."""
+    # The select whose from or join reads the table, not one of an enclosing query
+    selects = {id(select): select for table in tree.find_all(exp.Table) if table.name == table_name
+               for select in [table.find_ancestor(exp.Select)] if select is not None}
+    window = False
+    for select in selects.values():
+        where = select.args.get("where")
+        if where is not None and any(column.name == field for column in where.find_all(exp.Column)):
+            continue
+        lower, upper = _time_bounds(where, time_fields) if where is not None else (None, None)
+        if lower is None and upper is None and ranges:
+            # Open ends (since 2024) leave that side unbounded
+            starts = [time_range.start for time_range in ranges]
+            ends = [time_range.end for time_range in ranges]
+            lower = None if None in starts else min(starts)
+            upper = None if None in ends else max(ends)
+        elif lower is None and upper is None:
+            lower = window_start
+            window = True
+        if lower is not None:
+            select.where(exp.GTE(this=exp.column(field, quoted=True), expression=exp.Literal.string(lower)), copy=False)
+        if upper is not None:
+            select.where(exp.LTE(this=exp.column(field, quoted=True), expression=exp.Literal.string(upper)), copy=False)
+    return window
+
+def _output_alias(column) -> bool:
+    """Whether column is an ORDER BY or HAVING reference to an AS alias of its own select, not to a field"""
+    clause = column.find_ancestor(exp.AggFunc, exp.Order, exp.Having, exp.Select, exp.Union)
+    if not isinstance(clause, (exp.Order, exp.Having)) or not isinstance(clause.parent, (exp.Select, exp.Union)):
+        return False
+    return column.name in {projection.alias for projection in clause.parent.selects if isinstance(projection, exp.Alias)}
+
+def resolve_aliases(tree, table_name: str, columns: dict, plan_joins) -> None:
+    """Rewrite alias columns to table.field and the dataset table to the tables they need
+
+    columns maps each alias to its (table, field). plan_joins is called with the tables the SQL
+    reads, in order of first use, and returns the table to read and the (table, condition) pairs
+    to left join to it."""
+    tables = []
+    dataset_tables = []
+    for node in list(tree.find_all(exp.Column, exp.Table)):
+        if isinstance(node, exp.Table):
+            if node.name == table_name:
+                dataset_tables.append(node)
+            continue
+        column = columns.get(node.name)
+        if column is None or node.table or _output_alias(node):
+            continue
+        node.replace(exp.Column(this=exp.to_identifier(column[1]), table=exp.to_identifier(column[0])))
+        if column[0] not in tables:
+            tables.append(column[0])
+    if not dataset_tables:
+        return
+    root, joins = plan_joins(tables)
+    for table in dataset_tables:
+        select = table.find_ancestor(exp.Select)
+        read_from = isinstance(table.parent, exp.From)
+        table.replace(exp.to_table(root))
+        if select is not None and read_from:
+            for other, condition in joins:
+                select.join(exp.to_table(other), on=sqlglot.condition(condition, dialect="mysql"), join_type="left", copy=False)
@@ -0,0 +1,89 @@
+"""
+SQL for simple questions written from the mapping alone, without the LLM.
+
+Covers the common shape "show me total tpv by is cross border payment in 2024 of
+transaction time": one or two metrics, up to two group-by dimensions and at most
+one time dimension bounded by the range the question states (the model's
+partition time field when the question names no time dimension). Only atom
+metrics are summed or averaged here; a derived metric (a ratio, a distinct
+count) aggregates its own way and is left to the LLM. The SQL is the
+backticked form the parsing prompt asks the LLM for, so validation and semantic
+transition treat it the same. Questions with anything else in them (filters,
+rankings, comparisons, words no alias accounts for) are left to the LLM.
+"""
+import threading
+from datetime import date
+
+from src.utils.semantic_catalog import ATOM_METRIC_TYPE
+from src.utils.spacy_util import normalize_tokens
+from src.utils.sql_validator import is_time_alias
+from src.utils.time_range import parse_time_ranges
+
+MAX_METRICS = 2
+MAX_GROUP_DIMENSIONS = 2
+# Words that ask for nothing beyond the metrics and dimensions themselves
+FILLER_WORDS = {"show", "me", "give", "get", "list", "display", "tell", "see", "find", "please", "i", "want", "need", "would", "like",
+                "to", "can", "you", "what", "whats", "what's", "is", "was", "are", "were", "the", "a", "an", "of", "by", "per", "each",
+                "in", "for", "during", "on", "and", "across", "over", "with", "grouped", "group", "split", "broken", "down",
+                "breakdown", "my", "our", "all", "overall", "how", "much", "total", "totals", "sum", "summed", "average", "averages",
+                "avg", "mean"}
+# Metrics are summed unless the question asks for an average
+AVERAGE_WORDS = {"average", "averages", "avg", "mean"}
+
+class SQLTemplates:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters = {"questions": 0, "handled": 0}
+    def generate(self, query: str, table_name: str, mapping_info: dict, metric_types: dict, partition_info: dict = None, today: date = None):
+        """SQL answering query from mapping_info alone, None when the question needs the LLM
+
+        metric_types holds the metric_type of every mapped metric alias."""
+        sql = self._generate(query, table_name, mapping_info, metric_types, partition_info or {}, today or date.today())
+        with self._lock:
+            self.counters["questions"] += 1
+            if sql is not None:
+                self.counters["handled"] += 1
+        return sql
+    @staticmethod
+    def _generate(query: str, table_name: str, mapping_info: dict, metric_types: dict, partition_info: dict, today: date):
+        metrics = [alias for alias, nature in mapping_info.items() if nature.is_metric]
+        dimensions = [alias for alias, nature in mapping_info.items() if nature.is_dimension and not is_time_alias(alias)]
+        time_dimensions = [alias for alias, nature in mapping_info.items() if nature.is_dimension and is_time_alias(alias)]
+        if any(nature.is_term for nature in mapping_info.values()):
+            return None
+        if not 1 <= len(metrics) <= MAX_METRICS or len(dimensions) > MAX_GROUP_DIMENSIONS or len(time_dimensions) > 1:
+            return None
+        if any(metric_types.get(metric) != ATOM_METRIC_TYPE for metric in metrics):
+            return None
+        text = query.casefold()
+        time_ranges = parse_time_ranges(text, today)
+        if time_ranges and not time_dimensions and len(partition_info) == 1:
+            # A range on no named time field bounds the partition time field
+            time_dimensions = list(partition_info)
+        # A range needs the field it bounds, and a time field without a range would only group by raw timestamps
+        if len(time_ranges) != len(time_dimensions):
+            return None
+        for time_range in reversed(time_ranges):
+            text = text[:time_range.span[0]] + " " + text[time_range.span[1]:]
+        alias_words = {word for alias in [*mapping_info, *partition_info] for word in normalize_tokens(alias)}
+        words = [word for word in normalize_tokens(text) if word not in alias_words]
+        if any(word not in FILLER_WORDS for word in words):
+            return None
+        aggregate = "avg" if any(word in AVERAGE_WORDS for word in words) else "sum"
+
+        columns = [f"`{dimension}`" for dimension in dimensions] + [f"{aggregate}(`{metric}`)" for metric in metrics]
+        sql = f"select {', '.join(columns)} from {table_name}"
+        if time_ranges:
+            field = time_dimensions[0]
+            bounds = [f"`{field}` >= '{time_ranges[0].start}'" if time_ranges[0].start else "",
+                      f"`{field}` <= '{time_ranges[0].end}'" if time_ranges[0].end else ""]
+            sql += " where " + " AND ".join(bound for bound in bounds if bound)
+        if dimensions:
+            sql += " group by " + ", ".join(f"`{dimension}`" for dimension in dimensions)
+        return sql
+    def stats(self) -> dict:
+        with self._lock:
+            questions = self.counters["questions"]
+            return {**self.counters, "handled_fraction": self.counters["handled"] / questions if questions else 0.0}
+
+sql_templates = SQLTemplates()
@@ -0,0 +1,80 @@
+"""
+Local checks of the SQL written by the parsing LLM, mirroring the rules of its prompt.
+
+The SQL is parsed with sqlglot (mysql dialect), so a well-formed answer can skip
+the correction LLM; every problem found is returned as a message.
+"""
+import re
+
+from sqlglot import exp
+from sqlglot.errors import ParseError
+
+from src.utils.sql_rewrite import parse_statements
+
+# Questions that state a time range: a year, a date, or a relative period
+TIME_RANGE_PATTERN = re.compile(
+    r"\b(?:19|20)\d{2}\b|\d{1,2}[-/]\d{1,2}|\b(?:today|yesterday|tomorrow|day|days|week|weeks|month|months|quarter|quarters|year|years|"
+    r"january|february|march|april|may|june|july|august|september|october|november|december|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec|"
+    r"since|until|before|after|ytd|mtd)\b", re.IGNORECASE)
+# Periods grouped by rather than filtered on
+PERIOD_GROUPING_PATTERN = re.compile(r"\b(?:by|per|each|every)\s+(?:day|week|month|quarter|year)s?\b", re.IGNORECASE)
+
+def is_time_alias(alias: str) -> bool:
+    """Dimensions the prompts describe as timestamps (Format yyyy-MM-dd 00:00:00)"""
+    return alias.endswith('time')
+
+def validate_sql(sql: str, query: str, table_name: str, mapping_info: dict, partition_info: dict = None) -> list:
+    """Problems of sql against the parsing prompt's rules, empty when it can be used as is
+
+    partition_info holds the PartitionTimeField aliases, timestamps the SQL may filter on without using them."""
+    if not sql or not sql.strip():
+        return ["empty SQL"]
+    if "```" in sql:
+        return ["SQL is wrapped in markdown"]
+    try:
+        statements = parse_statements(sql)
+    except ParseError as e:
+        return [f"syntax error: {e}"]
+    if len(statements) != 1:
+        return ["expected exactly one statement"]
+    tree = statements[0]
+    if not isinstance(tree, (exp.Select, exp.Union)):
+        return ["not a select statement"]
+
+    problems = []
+    partitions = set(partition_info or ())
+    aliases = set(mapping_info) | partitions
+    time_aliases = {alias for alias, nature in mapping_info.items() if nature.is_dimension and is_time_alias(alias)} | partitions
+    # Names the SQL declares itself: with blocks and AS aliases
+    ctes = {cte.alias_or_name for cte in tree.find_all(exp.CTE)}
+    declared = {alias.alias for alias in tree.find_all(exp.Alias)} | ctes
+
+    for table in tree.find_all(exp.Table):
+        if table.name != table_name and table.name not in ctes:
+            problems.append(f"unknown table {table.name}")
+    referenced = set()
+    for column in tree.find_all(exp.Column):
+        name = column.name
+        if name in aliases:
+            referenced.add(name)
+        elif name not in declared and not (column.this and isinstance(column.this, exp.Star)):
+            problems.append(f"unknown column {name}")
+    for alias in sorted(aliases - referenced - time_aliases):
+        problems.append(f"schema field {alias} is not used")
+
+    time_filters = []
+    for node in tree.find_all(exp.Between, exp.EQ, exp.NEQ, exp.GT, exp.GTE, exp.LT, exp.LTE, exp.In):
+        columns = {column.name for column in node.find_all(exp.Column)} & time_aliases
+        if not columns:
+            continue
+        time_filters.append(node)
+        if isinstance(node, (exp.Between, exp.In, exp.EQ, exp.NEQ)):
+            problems.append(f"time range on {', '.join(sorted(columns))} must use >, <, >= or <=")
+        if any(not isinstance(function, exp.Column) for function in node.find_all(exp.Func)):
+            problems.append(f"time range on {', '.join(sorted(columns))} is calculated with functions")
+    states_range = TIME_RANGE_PATTERN.search(PERIOD_GROUPING_PATTERN.sub(" ", query)) is not None
+    if time_filters and not states_range:
+        problems.append("time range is not expressed in the question")
+    if states_range and time_aliases and not time_filters:
+        problems.append("time range of the question is not filtered on")
+    return problems
@@ -0,0 +1,153 @@
+"""
+Local parser of the time range a question states, for SQL written without the LLM.
+
+Understands years (2024), quarters (q1 2024), months (march 2024, 2024-03), dates
+and date ranges (2024-01-01 to 2024-03-31), and periods relative to the current
+date (today, yesterday, this month, last year, last 7 days, ytd). Ranges are
+inclusive, from 00:00:00 of their first day to 23:59:59 of their last one, the
+way the parsing prompt's example writes them. Since, from, after, before and
+until make them open-ended, and a bare number is only a year in a year context
+(in 2024, year 2024), not an amount (over 2000).
+"""
+import calendar
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+MONTHS = {"jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6, "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12}
+MONTH = r"(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+DATE = r"(?:19|20)\d{2}[-/]\d{1,2}[-/]\d{1,2}"
+# The preposition introducing a range is part of it
+LEAD = r"(?:\b(?:in|for|during|of|on|over|within)\s+)?(?:the\s+)?"
+# Words leaving one end of the range that follows them open
+OPEN_BOUND = re.compile(r"\b(?P<bound>since|from|after|before|until|till|through)\s+(?:the\s+)?$")
+
+PATTERNS = [
+    ("dates", re.compile(r"(?:\b(?:from|between)\s+)?" + LEAD + rf"(?P<start>{DATE})\s*(?:to|and|until|till|through|-|~)\s*(?P<end>{DATE})")),
+    ("date", re.compile(LEAD + rf"(?P<start>{DATE})")),
+    ("month", re.compile(LEAD + rf"\b{MONTH}\.?\s+(?:of\s+)?(?P<year>(?:19|20)\d{{2}})\b")),
+    ("year_month", re.compile(LEAD + r"\b(?P<year>(?:19|20)\d{2})[-/](?P<month>\d{1,2})\b(?![-/]\d)")),
+    ("quarter", re.compile(LEAD + r"\bq(?P<quarter>[1-4])\s+(?:of\s+)?(?P<year>(?:19|20)\d{2})\b|\b(?P<year2>(?:19|20)\d{2})\s*q(?P<quarter2>[1-4])\b")),
+    ("year", re.compile(r"(?:\b(?P<context>in|for|during|of)\s+(?:the\s+)?)?\b(?P<keyword>year\s+)?(?P<year>(?:19|20)\d{2})\b")),
+    ("relative", re.compile(LEAD + r"\b(?P<which>last|past|previous|this|current)\s+(?:(?P<count>\d+)\s+)?(?P<unit>day|week|month|quarter|year)s?\b")),
+    ("today", re.compile(LEAD + r"\b(?P<day>today|yesterday)\b")),
+    ("to_date", re.compile(LEAD + r"\b(?P<period>ytd|mtd|year to date|month to date)\b")),
+]
+
+@dataclass(frozen=True, slots=True)
+class TimeRange:
+    """Inclusive range of days and where the question states it, None for an open end"""
+    first: date
+    last: date
+    span: tuple  # (start, end) character offsets in the casefolded question
+
+    @property
+    def start(self) -> str:
+        return self.first.strftime("%Y-%m-%d 00:00:00") if self.first else None
+
+    @property
+    def end(self) -> str:
+        return self.last.strftime("%Y-%m-%d 23:59:59") if self.last else None
+
+def _month_range(year: int, month: int) -> tuple:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+def _add_months(day: date, months: int) -> date:
+    months += day.year * 12 + day.month - 1
+    return date(months // 12, months % 12 + 1, 1)
+
+def _parse_date(text: str) -> date:
+    year, month, day = (int(part) for part in re.split(r"[-/]", text))
+    return date(year, month, day)
+
+def _relative(which: str, count: int, unit: str, today: date) -> tuple:
+    """last/this N days, weeks, months, quarters or years; last ones are the complete periods before the current one"""
+    if unit == "day":
+        if which in ("this", "current"):
+            return today, today
+        return today - timedelta(days=count), today - timedelta(days=1)
+    if unit == "week":
+        monday = today - timedelta(days=today.weekday())
+        if which in ("this", "current"):
+            return monday, today
+        return monday - timedelta(weeks=count), monday - timedelta(days=1)
+    months = {"month": 1, "quarter": 3, "year": 12}[unit]
+    if unit == "month":
+        current = date(today.year, today.month, 1)
+    elif unit == "quarter":
+        current = date(today.year, (today.month - 1) // 3 * 3 + 1, 1)
+    else:
+        current = date(today.year, 1, 1)
+    if which in ("this", "current"):
+        return current, today
+    return _add_months(current, -months * count), current - timedelta(days=1)
+
+def _range(kind: str, match: re.Match, today: date) -> tuple:
+    groups = match.groupdict()
+    if kind == "dates":
+        return _parse_date(groups["start"]), _parse_date(groups["end"])
+    if kind == "date":
+        day = _parse_date(groups["start"])
+        return day, day
+    if kind == "month":
+        return _month_range(int(groups["year"]), MONTHS[groups["month"][:3]])
+    if kind == "year_month":
+        return _month_range(int(groups["year"]), int(groups["month"]))
+    if kind == "quarter":
+        year = int(groups["year"] or groups["year2"])
+        quarter = int(groups["quarter"] or groups["quarter2"])
+        return date(year, quarter * 3 - 2, 1), _month_range(year, quarter * 3)[1]
+    if kind == "year":
+        year = int(groups["year"])
+        return date(year, 1, 1), date(year, 12, 31)
+    if kind == "relative":
+        count = int(groups["count"]) if groups["count"] else 1
+        return _relative(groups["which"], count, groups["unit"], today)
+    if kind == "today":
+        day = today if groups["day"] == "today" else today - timedelta(days=1)
+        return day, day
+    if groups["period"] in ("ytd", "year to date"):
+        return date(today.year, 1, 1), today
+    return date(today.year, today.month, 1), today
+
+def _open(bound: str, first: date, last: date) -> tuple:
+    """The range left open by a since, after, before or until bound on first..last"""
+    if bound in ("since", "from"):
+        return first, None
+    if bound == "after":
+        return last + timedelta(days=1), None
+    if bound == "before":
+        return None, first - timedelta(days=1)
+    return None, last
+
+def parse_time_ranges(text: str, today: date = None) -> list:
+    """Every time range stated in text, in order of appearance; overlapping expressions count once"""
+    today = today or date.today()
+    text = text.casefold()
+    taken = []
+    ranges = []
+    for kind, pattern in PATTERNS:
+        for match in pattern.finditer(text):
+            if any(match.start() < end and start < match.end() for start, end in taken):
+                continue
+            bound = OPEN_BOUND.search(text, 0, match.start()) if kind != "dates" else None
+            if kind == "year" and not (match.group("context") or match.group("keyword") or bound):
+                # A bare number, as likely an amount as a year
+                continue
+            span = (bound.start() if bound else match.start(), match.end())
+            taken.append(span)
+            try:
+                first, last = _range(kind, match, today)
+            except ValueError:
+                # Not a calendar date (2024-13-45), and not a year either
+                continue
+            if first > last:
+                continue
+            if bound:
+                first, last = _open(bound.group("bound"), first, last)
+            ranges.append(TimeRange(first, last, span))
+    return sorted(ranges, key=lambda time_range: time_range.span)
+
+def covered_days(text: str, today: date = None) -> list:
+    """(first, last) day of every range text states; relative ranges only compare equal while they cover the same days"""
+    return [(time_range.first, time_range.last) for time_range in parse_time_ranges(text, today)]
@@ -0,0 +1,139 @@
+"""
+Typo tolerant lookup over the alias vocabulary (SymSpell symmetric delete index).
+
+Every vocabulary word is indexed under all strings reachable by deleting up to
+max_distance characters from its first prefix_length characters. A misspelt
+question word generates its own deletes the same way; any shared delete is a
+candidate, which is then checked with a bounded edit distance. Lookup cost
+depends on the word length and max_distance, never on the vocabulary size, and
+prefix_length caps how many deletes a long word adds to the index.
+
+A candidate only replaces a question word when the alias trie backs it: it
+continues a path the preceding words start ("is cross bordr") or starts one the
+next word continues ("totl tpv"). Without that, only long words one edit away
+are corrected, and shorter ones with a letter doubled or dropped ("citty") when
+that is the only word they are one edit from and an alias starts with it, so
+common words ("date", "from", "show") are never turned into alias words nobody
+asked for.
+"""
+import sys
+
+# Words shorter than this are mostly abbreviations ("tpv", "gmv") and are never corrected
+MIN_TYPO_LENGTH = 4
+# Words corrected without a trie path backing them: this long and one edit away
+MIN_CONTEXT_FREE_LENGTH = 8
+# Preceding words a correction may continue the trie path of
+MAX_CONTEXT_WORDS = 4
+
+def allowed_distance(length: int) -> int:
+    """Edits tolerated for a word of this length: none for short words, one up to 7 characters, two beyond
+
+    Two words match when they are within the allowance of the shorter one, so each word only
+    needs its own allowance of deletes in the index."""
+    if length < MIN_TYPO_LENGTH:
+        return 0
+    return 1 if length <= 7 else 2
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance (insert, delete, substitute, swap adjacent), max_distance + 1 once it exceeds max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    # Only the differing middle needs the quadratic table
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return min(len(a) + len(b), max_distance + 1)
+    previous_previous, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+class TypoIndex:
+    """Symmetric delete index of a vocabulary, word → number of aliases using it"""
+    def __init__(self, vocabulary: dict, max_distance: int = 2, prefix_length: int = 7) -> None:
+        self.vocabulary = vocabulary
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._deletes = {}  # delete string → words it was derived from (a bare str while there is only one)
+        for word in vocabulary:
+            if len(word) < MIN_TYPO_LENGTH or word.isdigit():
+                continue
+            for delete in self._variants(word, allowed_distance(len(word))):
+                words = self._deletes.get(delete)
+                if words is None:
+                    self._deletes[sys.intern(delete)] = word
+                elif isinstance(words, str):
+                    self._deletes[delete] = (words, word)
+                else:
+                    self._deletes[delete] = words + (word,)
+    def _variants(self, word: str, distance: int) -> set:
+        """word's prefix and every string left after deleting up to distance characters from it"""
+        prefix = word[:self.prefix_length]
+        variants = {prefix}
+        frontier = {prefix}
+        for _ in range(min(distance, self.max_distance)):
+            frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))} - variants
+            variants |= frontier
+        return variants
+    def __len__(self) -> int:
+        return len(self._deletes)
+    def lookup(self, word: str, max_distance: int = None) -> list:
+        """Vocabulary words within max_distance edits of word, as (candidate, distance) closest first, then most used"""
+        if max_distance is None:
+            max_distance = allowed_distance(len(word))
+        max_distance = min(max_distance, self.max_distance)
+        if word in self.vocabulary:
+            return [(word, 0)]
+        if max_distance <= 0:
+            return []
+        candidates = set()
+        for delete in self._variants(word, max_distance):
+            words = self._deletes.get(delete)
+            if words is not None:
+                candidates.update((words,) if isinstance(words, str) else words)
+        results = []
+        for candidate in candidates:
+            candidate_distance = min(max_distance, allowed_distance(len(candidate)))
+            distance = edit_distance(word, candidate, candidate_distance)
+            if distance <= candidate_distance:
+                results.append((candidate, distance))
+        results.sort(key=lambda item: (item[1], -self.vocabulary[item[0]], item[0]))
+        return results
+    def correct(self, tokens: list, trie) -> list:
+        """Replace tokens missing from the vocabulary by the closest word trie backs in their context, when there is one
+
+        trie is the SentenceTrie (or CompiledTrie) the vocabulary comes from."""
+        corrected = []
+        for i, token in enumerate(tokens):
+            if token in self.vocabulary or token.isdigit():
+                corrected.append(token)
+                continue
+            candidates = self.lookup(token)
+            following = tokens[i + 1:i + 2]
+            backed = [candidate for candidate, distance in candidates
+                      if any(trie.has_path(corrected[i - k:] + [candidate]) for k in range(1, min(i, MAX_CONTEXT_WORDS) + 1))
+                      or (following and trie.has_path([candidate] + following))]
+            if backed:
+                corrected.append(backed[0])
+            elif candidates and len(token) >= MIN_CONTEXT_FREE_LENGTH and candidates[0][1] <= 1:
+                corrected.append(candidates[0][0])
+            elif (len(candidates) == 1 and candidates[0][1] == 1 and abs(len(token) - len(candidates[0][0])) == 1
+                  and trie.has_path([candidates[0][0]])):
+                # A short alias word with a letter inserted or dropped; substitutions and swaps would turn real words into it
+                corrected.append(candidates[0][0])
+            else:
+                corrected.append(token)
+        return corrected
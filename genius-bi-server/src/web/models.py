@@ -157,6 +157,8 @@ class ChatAssistant(Base):
     chat_name = Column(String(50), nullable=False)
     chat_description = Column(String(50), nullable=False)
     analysis_assistant_id = Column(BigInteger, nullable=False)
+    llm_id = Column(BigInteger) # llm_tbl row answering this chat, the default LLM when empty
+    prompt_cache = Column(SmallInteger, server_default='1') # 0 opts this chat out of cached answers: LLM prompts, question plans and reused examples
     create_by = Column(String(50))
     create_time = Column(TIMESTAMP, server_default=func.now())
     update_by = Column(String(50))
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
+import orjson
 
 from src.web.models import ChatAssistant as ChatAssistantModel
 from src.web.schemas import ChatAssistant as ChatAssistantSchema
 from src.web.schemas import ChatAssistantQuery as ChatAssistantQuery
 from src.web.schemas import ChatAssistantCreate, ChatAssistantUpdate
 from src.dataprovider.mysql.mysql_db import get_db
+from src.utils.plan_cache import plan_cache
+from src.utils.sql_template import sql_templates
 
 router = APIRouter()
 
@@ -40,11 +44,26 @@ def read_chat_assistants(page: int = 1, size: int = 10, db: Session = Depends(ge
         "pages": total_pages
     } 
 
-@router.post("/chat-assistants/parsing")
-def create_chat_assistant(query: ChatAssistantQuery, db: Session = Depends(get_db)):
-    from src.dataprovider.mysql.mysql_db import execute_sql_ext
+@router.get("/chat-assistants/parsing/graph", response_class=PlainTextResponse)
+def read_chat_query_parsing_graph(request: Request):
+    """Mermaid diagram of the chat query parsing graph"""
+    return request.app.state.chat_query_parsing_graph.get_graph().draw_mermaid()
+
+@router.get("/chat-assistants/plan-cache/stats")
+def read_plan_cache_stats():
+    """Hit/miss counters and size of the question plan cache of this worker"""
+    return plan_cache.stats()
+
+@router.get("/chat-assistants/sql-templates/stats")
+def read_sql_template_stats():
+    """Questions of this worker answered by SQL templates, without the LLM"""
+    return sql_templates.stats()
+
+async def build_chat_query_parsing_state(query: ChatAssistantQuery) -> dict:
+    """Initial graph state of a question: the chat's dataset plus empty node outputs"""
+    from src.dataprovider.mysql.mysql_db import execute_sql_ext_async
     sql = '''
-    select d.id as dataset_id, d.name as dataset_name
+    select d.id as dataset_id, d.name as dataset_name, a.llm_id, a.prompt_cache
     from chat_assistant_tbl a
     join analysis_assistant_tbl b
       on a.analysis_assistant_id  = b.id
@@ -52,30 +71,75 @@ def create_chat_assistant(query: ChatAssistantQuery, db: Session = Depends(get_d
       on a.analysis_assistant_id = c.analysis_assistant_id
     join dataset_tbl d
       on c.dataset_id = d.id
-    where a.id = 1
-    group by d.id, d.name
+    where a.id = :chat_id
+    group by d.id, d.name, a.llm_id, a.prompt_cache
     '''
-    results = execute_sql_ext(sql, {"chat_id": 1})
+    results = await execute_sql_ext_async(sql, {"chat_id": query.chat_id})
+    if not results:
+        # Raised before any event is streamed, so both endpoints answer 404
+        raise HTTPException(status_code=404, detail="Chat assistant not found or has no dataset")
 
-    from src.langgraph.text2insight.text2insight_graph import Text2InsightGraph
-    text2InsightGraph = Text2InsightGraph()
-    agent = text2InsightGraph.build_chat_query_parsing_graph()
-    initial_state = {
+    return {
         "query": query.query,
         "chat_id": query.chat_id,
         "dataset_id": results[0]['dataset_id'],
         "dataset_name": results[0]['dataset_name'],
+        "llm_id": results[0]['llm_id'],
+        "prompt_cache": results[0]['prompt_cache'] != 0,
+        "plan_info": None,
         "mapping_info": None,
+        "partition_info": None,
         "parsing_info": None,
+        "validation_info": None,
         "correction_info": None,
         "transition_info": None,
         "result_info": None,
-        "current_phase": "mapping",
+        "current_phase": "plan_cache",
         "error": None
     }
-    print("LangGraph Mermaid流程图：")
-    print(agent.get_graph().draw_mermaid())
 
-    result = agent.invoke(initial_state)
+def sse_event(event: str, data) -> bytes:
+    """One server-sent event with a JSON payload"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data, default=str) + b"\n\n"
+
+@router.post("/chat-assistants/parsing")
+async def create_chat_assistant(query: ChatAssistantQuery, request: Request):
+    # Async end to end, a question waiting on the LLM holds no server thread
+    initial_state = await build_chat_query_parsing_state(query)
+
+    # Compiled once at startup, see lifespan in __main__.py
+    agent = request.app.state.chat_query_parsing_graph
+    result = await agent.ainvoke(initial_state)
+
+    return result
+
+@router.post("/chat-assistants/parsing/stream")
+async def stream_chat_assistant(query: ChatAssistantQuery, request: Request):
+    """Same as /chat-assistants/parsing, as server-sent events while the graph runs
+
+    Events: phase ({"phase"}) when a node starts, mapping (the matched aliases), token ({"phase", "text"})
+    for every piece of SQL the LLM writes, result (the final state) and error ({"detail"})."""
+    initial_state = await build_chat_query_parsing_state(query)
+    agent = request.app.state.chat_query_parsing_graph
+
+    async def events():
+        state = dict(initial_state)
+        yield sse_event("phase", {"phase": state["current_phase"]})
+        try:
+            # updates: each node's output once it finishes, custom: the tokens nodes write while they run
+            async for mode, chunk in agent.astream(initial_state, stream_mode=["updates", "custom"]):
+                if mode == "custom":
+                    yield sse_event("token", chunk)
+                    continue
+                for node, update in chunk.items():
+                    state.update(update or {})
+                    if node == "mapping":
+                        yield sse_event("mapping", state["mapping_info"])
+                    if state["current_phase"] != "end":
+                        yield sse_event("phase", {"phase": state["current_phase"]})
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+        yield sse_event("result", state)
 
-    return result
\ No newline at end of file
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -9,6 +9,9 @@ from src.web.schemas import Dataset as DatasetSchema
 from src.web.schemas import DatasetCreate, DatasetUpdate
 from src.dataprovider.mysql.mysql_db import get_db
 from sqlalchemy.exc import SQLAlchemyError
+from src.utils.spacy_util import spacy_util
+from src.utils.plan_cache import plan_cache
+from src.utils.semantic_catalog import semantic_catalog
 
 router = APIRouter()
 
@@ -38,6 +41,9 @@ def create_dataset(dataset: DatasetCreate, db: Session = Depends(get_db)):
             
         db.commit()
         db.refresh(db_model)
+        spacy_util.invalidate_dataset(db_model.id)
+        plan_cache.invalidate_dataset(db_model.id)
+        semantic_catalog.invalidate()
         return db_model
     except SQLAlchemyError as e:
         db.rollback()  
@@ -79,6 +85,9 @@ def update_dataset(dataset_id: int, dataset: DatasetUpdate, db: Session = Depend
         setattr(db_dataset, var, value)
     db.commit()
     db.refresh(db_dataset)
+    spacy_util.invalidate_dataset(dataset_id)
+    plan_cache.invalidate_dataset(dataset_id)
+    semantic_catalog.invalidate()
     return db_dataset
 
 @router.delete("/datasets/{dataset_id}", response_model=DatasetSchema)
@@ -88,4 +97,7 @@ def delete_dataset(dataset_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Dataset not found")
     db.delete(db_dataset)
     db.commit()
+    spacy_util.invalidate_dataset(dataset_id)
+    plan_cache.invalidate_dataset(dataset_id)
+    semantic_catalog.invalidate()
     return db_dataset 
\ No newline at end of file
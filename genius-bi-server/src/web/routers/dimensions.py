@@ -6,6 +6,10 @@ from src.web.models import ModelDimension as ModelDimensionModel
 from src.web.schemas import ModelDimension as ModelDimensionSchema
 from src.web.schemas import ModelDimensionCreate, ModelDimensionUpdate
 from src.dataprovider.mysql.mysql_db import get_db
+from src.models.word_with_nature import WordWithNature
+from src.utils.spacy_util import spacy_util
+from src.utils.plan_cache import plan_cache
+from src.utils.semantic_catalog import semantic_catalog
 
 router = APIRouter()
 
@@ -15,6 +19,9 @@ def create_dimension(dimension: ModelDimensionCreate, db: Session = Depends(get_
     db.add(db_dimension)
     db.commit()
     db.refresh(db_dimension)
+    spacy_util.insert_words([WordWithNature.of_dimension(db_dimension.alias, db_dimension.model_id, db_dimension.id)])
+    plan_cache.invalidate_model(db_dimension.model_id)
+    semantic_catalog.invalidate()
     return db_dimension
 
 @router.get("/dimensions/")
@@ -49,10 +56,17 @@ def update_dimension(id: int, dimension: ModelDimensionUpdate, db: Session = Dep
     db_dimension = db.query(ModelDimensionModel).filter(ModelDimensionModel.id == id).first()
     if db_dimension is None:
         raise HTTPException(status_code=404, detail="Dimension not found")
+    old_word = WordWithNature.of_dimension(db_dimension.alias, db_dimension.model_id, db_dimension.id)
+    old_model_id = db_dimension.model_id
     for var, value in vars(dimension).items():
         setattr(db_dimension, var, value)
     db.commit()
     db.refresh(db_dimension)
+    spacy_util.rename_word(old_word, WordWithNature.of_dimension(db_dimension.alias, db_dimension.model_id, db_dimension.id))
+    plan_cache.invalidate_model(db_dimension.model_id)
+    if old_model_id != db_dimension.model_id:
+        plan_cache.invalidate_model(old_model_id)
+    semantic_catalog.invalidate()
     return db_dimension
 
 @router.delete("/dimensions/{dimension_id}", response_model=ModelDimensionSchema)
@@ -60,6 +74,10 @@ def delete_dimension(dimension_id: int, db: Session = Depends(get_db)):
     db_dimension = db.query(ModelDimensionModel).filter(ModelDimensionModel.id == dimension_id).first()
     if db_dimension is None:
         raise HTTPException(status_code=404, detail="Dimension not found")
+    old_word = WordWithNature.of_dimension(db_dimension.alias, db_dimension.model_id, db_dimension.id)
     db.delete(db_dimension)
     db.commit()
+    spacy_util.delete_words([old_word])
+    plan_cache.invalidate_model(db_dimension.model_id)
+    semantic_catalog.invalidate()
     return db_dimension 
\ No newline at end of file
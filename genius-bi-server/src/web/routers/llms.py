@@ -6,6 +6,8 @@ from src.web.models import LLM as LLMModel
 from src.web.schemas import LLM as LLMSchema
 from src.web.schemas import LLMCreate, LLMUpdate
 from src.dataprovider.mysql.mysql_db import get_db
+from src.llm.llm_registry import llm_registry
+from src.llm.prompt_cache import prompt_cache
 
 router = APIRouter()
 
@@ -15,6 +17,7 @@ def create_llm(llm: LLMCreate, db: Session = Depends(get_db)):
     db.add(db_llm)
     db.commit()
     db.refresh(db_llm)
+    llm_registry.refresh()
     return db_llm
 
 @router.get("/llms/")
@@ -37,6 +40,11 @@ def read_llms(page: int = 0, limit: int = 100, db: Session = Depends(get_db)):
         "page": page
     }
 
+@router.get("/llms/prompt-cache/stats")
+def read_prompt_cache_stats():
+    """Hit/miss counters and size of the LLM answer cache of this worker"""
+    return prompt_cache.stats()
+
 @router.get("/llms/{llm_id}")
 def read_llm(llm_id: int, db: Session = Depends(get_db)):
     llm = db.query(LLMModel).filter(LLMModel.id == llm_id).first()
@@ -55,6 +63,8 @@ def update_llm(llm_id: int, llm: LLMUpdate, db: Session = Depends(get_db)):
         setattr(db_llm, var, value)
     db.commit()
     db.refresh(db_llm)
+    # Running questions keep the old client, new ones pick up the change
+    llm_registry.refresh()
     return db_llm
 
 @router.delete("/llms/{llm_id}", response_model=LLMSchema)
@@ -64,4 +74,5 @@ def delete_llm(llm_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="LLM not found")
     db.delete(db_llm)
     db.commit()
+    llm_registry.refresh()
     return db_llm 
\ No newline at end of file
@@ -6,6 +6,10 @@ from src.web.models import ModelMetric as ModelMetricModel
 from src.web.schemas import ModelMetric as ModelMetricSchema
 from src.web.schemas import ModelMetricCreate, ModelMetricUpdate
 from src.dataprovider.mysql.mysql_db import get_db
+from src.models.word_with_nature import WordWithNature
+from src.utils.spacy_util import spacy_util
+from src.utils.plan_cache import plan_cache
+from src.utils.semantic_catalog import semantic_catalog
 
 router = APIRouter()
 
@@ -15,6 +19,9 @@ def create_metric(metric: ModelMetricCreate, db: Session = Depends(get_db)):
     db.add(db_metric)
     db.commit()
     db.refresh(db_metric)
+    spacy_util.insert_words([WordWithNature.of_metric(db_metric.alias, db_metric.model_id, db_metric.id)])
+    plan_cache.invalidate_model(db_metric.model_id)
+    semantic_catalog.invalidate()
     return db_metric
 
 @router.get("/metrics/")
@@ -49,10 +56,17 @@ def update_metric(metric_id: int, metric: ModelMetricUpdate, db: Session = Depen
     db_metric = db.query(ModelMetricModel).filter(ModelMetricModel.id == metric_id).first()
     if db_metric is None:
         raise HTTPException(status_code=404, detail="Metric not found")
+    old_word = WordWithNature.of_metric(db_metric.alias, db_metric.model_id, db_metric.id)
+    old_model_id = db_metric.model_id
     for var, value in vars(metric).items():
         setattr(db_metric, var, value)
     db.commit()
     db.refresh(db_metric)
+    spacy_util.rename_word(old_word, WordWithNature.of_metric(db_metric.alias, db_metric.model_id, db_metric.id))
+    plan_cache.invalidate_model(db_metric.model_id)
+    if old_model_id != db_metric.model_id:
+        plan_cache.invalidate_model(old_model_id)
+    semantic_catalog.invalidate()
     return db_metric
 
 @router.delete("/metrics/{metric_id}", response_model=ModelMetricSchema)
@@ -60,6 +74,10 @@ def delete_metric(metric_id: int, db: Session = Depends(get_db)):
     db_metric = db.query(ModelMetricModel).filter(ModelMetricModel.id == metric_id).first()
     if db_metric is None:
         raise HTTPException(status_code=404, detail="Metric not found")
+    old_word = WordWithNature.of_metric(db_metric.alias, db_metric.model_id, db_metric.id)
     db.delete(db_metric)
     db.commit()
+    spacy_util.delete_words([old_word])
+    plan_cache.invalidate_model(db_metric.model_id)
+    semantic_catalog.invalidate()
     return db_metric 
\ No newline at end of file
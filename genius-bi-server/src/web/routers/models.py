@@ -9,6 +9,10 @@ from src.web.models import ModelMetric as ModelMetricModel
 from src.web.schemas import Model as ModelSchema
 from src.web.schemas import ModelCreate, ModelUpdate, ModelDimensionCreate, ModelMetricCreate
 from src.dataprovider.mysql.mysql_db import get_db
+from src.models.word_with_nature import WordWithNature
+from src.utils.spacy_util import spacy_util
+from src.utils.plan_cache import plan_cache
+from src.utils.semantic_catalog import semantic_catalog
 
 router = APIRouter()
 
@@ -21,6 +25,7 @@ def create_model_with_relations(model_data: ModelCreate, db: Session):
         db.flush()  # This will get us the model ID without committing
 
         # Create dimensions
+        db_fields = []
         for field in model_data.fields:
             if field.semantic_type == 'metric':
                 metric_dict = {}
@@ -30,6 +35,7 @@ def create_model_with_relations(model_data: ModelCreate, db: Session):
                 metric_dict['express'] = field.extended_config
                 db_metric = ModelMetricModel(**metric_dict)
                 db.add(db_metric)
+                db_fields.append(db_metric)
             else:
                 dimension_dict = {}
                 dimension_dict['model_id'] = db_model.id
@@ -39,9 +45,19 @@ def create_model_with_relations(model_data: ModelCreate, db: Session):
                 dimension_dict['express'] = field.extended_config
                 db_dimension = ModelDimensionModel(**dimension_dict)
                 db.add(db_dimension)
+                db_fields.append(db_dimension)
+        db.flush()  # Assign field ids for the lexicon update
+
+        words = []
+        for db_field in db_fields:
+            if isinstance(db_field, ModelMetricModel):
+                words.append(WordWithNature.of_metric(db_field.alias, db_field.model_id, db_field.id))
+            else:
+                words.append(WordWithNature.of_dimension(db_field.alias, db_field.model_id, db_field.id))
             
         db.commit()
         db.refresh(db_model)
+        spacy_util.insert_words(words)
         return db_model
     except SQLAlchemyError as e:
         db.rollback()
@@ -87,6 +103,8 @@ def update_model(model_id: int, model: ModelUpdate, db: Session = Depends(get_db
         setattr(db_model, var, value)
     db.commit()
     db.refresh(db_model)
+    plan_cache.invalidate_model(model_id)
+    semantic_catalog.invalidate()
     return db_model
 
 @router.delete("/models/{model_id}", response_model=ModelSchema)
@@ -96,6 +114,8 @@ def delete_model(model_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Model not found")
     db.delete(db_model)
     db.commit()
+    plan_cache.invalidate_model(model_id)
+    semantic_catalog.invalidate()
     return db_model
 
 @router.get("/models/{model_id}/dimensions")
@@ -6,6 +6,9 @@ from src.web.models import Term as TermModel
 from src.web.schemas import Term as TermSchema
 from src.web.schemas import TermCreate, TermUpdate
 from src.dataprovider.mysql.mysql_db import get_db
+from src.models.word_with_nature import WordWithNature
+from src.utils.spacy_util import spacy_util
+from src.utils.plan_cache import plan_cache
 
 router = APIRouter()
 
@@ -15,6 +18,9 @@ def create_term(term: TermCreate, db: Session = Depends(get_db)):
     db.add(db_term)
     db.commit()
     db.refresh(db_term)
+    spacy_util.insert_words([WordWithNature.of_term(db_term.synonym, db_term.id)])
+    # Terms are shared by every dataset
+    plan_cache.clear()
     return db_term
 
 @router.get("/terms/", )
@@ -51,10 +57,14 @@ def update_term(term_id: int, term: TermUpdate, db: Session = Depends(get_db)):
     db_term = db.query(TermModel).filter(TermModel.id == term_id).first()
     if db_term is None:
         raise HTTPException(status_code=404, detail="Term not found")
+    old_word = WordWithNature.of_term(db_term.synonym, db_term.id)
     for var, value in vars(term).items():
         setattr(db_term, var, value)
     db.commit()
     db.refresh(db_term)
+    spacy_util.rename_word(old_word, WordWithNature.of_term(db_term.synonym, db_term.id))
+    # Terms are shared by every dataset
+    plan_cache.clear()
     return db_term
 
 @router.delete("/terms/{term_id}", response_model=TermSchema)
@@ -62,6 +72,10 @@ def delete_term(term_id: int, db: Session = Depends(get_db)):
     db_term = db.query(TermModel).filter(TermModel.id == term_id).first()
     if db_term is None:
         raise HTTPException(status_code=404, detail="Term not found")
+    old_word = WordWithNature.of_term(db_term.synonym, db_term.id)
     db.delete(db_term)
     db.commit()
+    spacy_util.delete_words([old_word])
+    # Terms are shared by every dataset
+    plan_cache.clear()
     return db_term 
\ No newline at end of file
@@ -249,6 +249,8 @@ class ChatAssistant(BaseModel):
     chat_name: str
     chat_description: str
     analysis_assistant_id: int
+    llm_id: Optional[int] = None
+    prompt_cache: Optional[int] = 1
     create_by: Optional[str] = None
     create_time: Optional[datetime] = None
     update_by: Optional[str] = None
@@ -268,10 +270,14 @@ class ChatAssistantCreate(BaseModel):
     chat_name: str
     chat_description: str
     analysis_assistant_id: int
+    llm_id: Optional[int] = None
+    prompt_cache: Optional[int] = 1
     create_by: Optional[str] = None
 
 class ChatAssistantUpdate(BaseModel):
     chat_name: Optional[str] = None
     chat_description: Optional[str] = None
     analysis_assistant_id: Optional[int] = None
+    llm_id: Optional[int] = None
+    prompt_cache: Optional[int] = None
     update_by: Optional[str] = None 
\ No newline at end of file
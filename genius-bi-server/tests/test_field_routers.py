@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("spacy")
+
+from src.web.routers import dimensions, metrics
+from src.web.schemas import ModelDimensionUpdate, ModelMetricUpdate
+
+class FakeSession:
+    def __init__(self, row):
+        self.row = row
+    def query(self, model):
+        return self
+    def filter(self, *criteria):
+        return self
+    def first(self):
+        return self.row
+    def commit(self):
+        pass
+    def refresh(self, row):
+        pass
+
+@pytest.fixture
+def invalidated(monkeypatch):
+    models = []
+    for router in (dimensions, metrics):
+        monkeypatch.setattr(router, "spacy_util", SimpleNamespace(rename_word=lambda old, new: None))
+        monkeypatch.setattr(router, "plan_cache", SimpleNamespace(invalidate_model=models.append))
+        monkeypatch.setattr(router, "semantic_catalog", SimpleNamespace(invalidate=lambda: None))
+    return models
+
+def test_moving_a_dimension_invalidates_both_models(invalidated):
+    row = SimpleNamespace(id=5, model_id=1, name="city", alias="city", dimension_type=None, description=None, express=None)
+    update = ModelDimensionUpdate(id=5, model_id=2, name="city", alias="city")
+    dimensions.update_dimension(5, update, FakeSession(row))
+    assert sorted(invalidated) == [1, 2]
+
+def test_moving_a_metric_invalidates_both_models(invalidated):
+    row = SimpleNamespace(id=7, model_id=1, name="tpv", alias="total tpv", metric_type=None, description=None, express=None)
+    update = ModelMetricUpdate(id=7, model_id=3, name="tpv", alias="total tpv")
+    metrics.update_metric(7, update, FakeSession(row))
+    assert sorted(invalidated) == [1, 3]
+
+def test_editing_in_place_invalidates_the_model_once(invalidated):
+    row = SimpleNamespace(id=5, model_id=1, name="city", alias="city", dimension_type=None, description=None, express=None)
+    update = ModelDimensionUpdate(id=5, model_id=1, name="city", alias="town")
+    dimensions.update_dimension(5, update, FakeSession(row))
+    assert invalidated == [1]
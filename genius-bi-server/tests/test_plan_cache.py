@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("spacy")
+
+from src import settings
+from src.utils import plan_cache as plan_cache_module
+from src.utils.plan_cache import PlanCache
+
+@pytest.fixture
+def reads(monkeypatch):
+    reads = []
+    async def execute_sql_ext_async(sql, params=None):
+        reads.append(params["dataset_id"])
+        return [{"version": f"v{len(reads)}"}]
+    monkeypatch.setattr(plan_cache_module, "execute_sql_ext_async", execute_sql_ext_async)
+    monkeypatch.setattr(plan_cache_module, "execute_sql_ext", lambda sql, params=None: [{"dataset_id": 1}])
+    monkeypatch.setattr(settings, "PLAN_CACHE_VERSION_SECONDS", 60)
+    return reads
+
+def test_version_is_read_once_within_the_interval(reads):
+    cache = PlanCache(10)
+    assert asyncio.run(cache.version(1)) == "v1"
+    assert asyncio.run(cache.version(1)) == "v1"
+    assert reads == ["1"]
+
+def test_version_is_read_per_dataset(reads):
+    cache = PlanCache(10)
+    asyncio.run(cache.version(1))
+    asyncio.run(cache.version(2))
+    assert reads == ["1", "2"]
+
+def test_version_is_read_again_after_an_invalidation(reads):
+    cache = PlanCache(10)
+    asyncio.run(cache.version(1))
+    cache.invalidate_model(7)
+    assert asyncio.run(cache.version(1)) == "v2"
+    cache.clear()
+    assert asyncio.run(cache.version(1)) == "v3"
+
+def test_zero_interval_reads_every_time(reads, monkeypatch):
+    monkeypatch.setattr(settings, "PLAN_CACHE_VERSION_SECONDS", 0)
+    cache = PlanCache(10)
+    asyncio.run(cache.version(1))
+    asyncio.run(cache.version(1))
+    assert reads == ["1", "1"]
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from src.llm.prompt_cache import PromptCache
+from src.models.nature import Nature
+
+MAPPING = {"total tpv": Nature.of(2, 1, 1), "transaction time": Nature.of(1, 1, 3)}
+
+def test_deleted_answer_is_gone_from_both_tiers(tmp_path):
+    path = str(tmp_path / "prompt_cache.db")
+    cache = PromptCache(path, 10, 60)
+    cache.put("key", "select 1")
+    cache.delete("key")
+    assert cache.get("key") is None
+    assert PromptCache(path, 10, 60).get("key") is None
+
+@pytest.fixture
+def validation(monkeypatch, tmp_path):
+    pytest.importorskip("spacy")
+    pytest.importorskip("sqlalchemy")
+    from src.langgraph.text2insight import sql_validation_graph_node
+    cache = PromptCache(str(tmp_path / "prompt_cache.db"), 10, 60)
+    monkeypatch.setattr(sql_validation_graph_node, "prompt_cache", cache)
+    monkeypatch.setattr(sql_validation_graph_node.example_store, "add", lambda *args: None)
+    def validate(sql):
+        cache.put("key", sql)
+        state = {"query": "total tpv in 2024 of transaction time", "dataset_id": 1, "dataset_name": "transaction",
+                 "mapping_info": MAPPING, "parsing_info": {"sql": sql, "cache_key": "key"}}
+        return asyncio.run(sql_validation_graph_node.execute_sql_validation(state))["current_phase"]
+    return cache, validate
+
+def test_rejected_parsing_answer_is_not_served_again(validation):
+    cache, validate = validation
+    assert validate("select sum(`total tpv`) from transaction") == "correction"
+    assert cache.get("key") is None
+
+def test_accepted_parsing_answer_stays_cached(validation):
+    cache, validate = validation
+    sql = ("select sum(`total tpv`) from transaction where `transaction time` >= '2024-01-01 00:00:00' "
+           "AND `transaction time` <= '2024-12-31 23:59:59'")
+    assert validate(sql) == "transition"
+    assert cache.get("key") == sql
+
+def test_cache_key_follows_the_sampling_settings():
+    pytest.importorskip("langchain.prompts")
+    pytest.importorskip("sqlalchemy")
+    from src.llm.llm_registry import DEFAULT_LLM, LLMClient
+    row = {**DEFAULT_LLM, "api_protocal": "fake"}
+    keys = {LLMClient({**row, **changed}).cache_key("sql_parsing", "Query:{query}", {"query": "total tpv"})
+            for changed in [{}, {"temperature": 0.7}, {"temperature": 0.2}, {"api_version": "2024-06-01"}]}
+    assert len(keys) == 4
+    assert LLMClient(row).cache_key("sql_parsing", "Query:{query}", {"query": "total tpv"}) in keys
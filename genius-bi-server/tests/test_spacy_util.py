@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("spacy")
+pytest.importorskip("sqlalchemy")
+
+from src import settings
+from src.models.nature import Nature, NatureKind
+from src.models.word_with_nature import WordWithNature
+from src.utils import spacy_util as spacy_util_module
+from src.utils.spacy_util import DATASET_FIELDS_SQL, LEXICON_SQL, LEXICON_VERSION_SQL, SpacyUtil
+
+CITY = Nature.of(NatureKind.DIMENSION, 1, 1)
+TPV = Nature.of(NatureKind.METRIC, 1, 2)
+
+class MetadataTables:
+    """The rows spacy_util reads, changed by the tests as another worker would"""
+    def __init__(self):
+        self.aliases = {"city": CITY, "total tpv": TPV}
+        self.dataset_fields = {1: [CITY]}
+        self.version = "v1"
+        self.reads = []
+    def execute_sql_ext(self, sql, params=None):
+        self.reads.append(sql)
+        if sql == LEXICON_VERSION_SQL:
+            return [{"version": self.version}]
+        if sql == LEXICON_SQL:
+            return [{"word": word, "nature": f"_{nature.model_id}_{nature.field_id}_{nature.kind.name.lower()}"}
+                    for word, nature in self.aliases.items()]
+        if sql == DATASET_FIELDS_SQL:
+            return [{"field_id": nature.field_id, "kind": nature.kind.name.lower()}
+                    for nature in self.dataset_fields.get(params["dataset_id"], [])]
+        raise AssertionError(sql)
+    async def execute_sql_ext_async(self, sql, params=None):
+        return self.execute_sql_ext(sql, params)
+
+@pytest.fixture
+def tables(monkeypatch):
+    tables = MetadataTables()
+    monkeypatch.setattr(spacy_util_module, "execute_sql_ext", tables.execute_sql_ext)
+    monkeypatch.setattr(spacy_util_module, "execute_sql_ext_async", tables.execute_sql_ext_async)
+    monkeypatch.setattr(settings, "LEXICON_SNAPSHOT_PATH", "")
+    monkeypatch.setattr(settings, "LEXICON_CHECK_SECONDS", 60)
+    return tables
+
+def matched(results):
+    return {nature for _, nature, _ in results}
+
+def test_dataset_fields_changed_elsewhere_are_matched_at_the_new_version(tables):
+    util = SpacyUtil()
+    assert matched(util.prefix_match_words("total tpv by city", 1, fields_version="f1")) == {CITY}
+    # Another worker adds the metric to the dataset; the lexicon tables themselves are unchanged
+    tables.dataset_fields[1].append(TPV)
+    assert matched(util.prefix_match_words("total tpv by city", 1, fields_version="f1")) == {CITY}
+    assert matched(util.prefix_match_words("total tpv by city", 1, fields_version="f2")) == {CITY, TPV}
+
+def test_dataset_trie_is_reused_at_the_same_version(tables):
+    util = SpacyUtil()
+    util.prefix_match_words("city", 1, fields_version="f1")
+    util.prefix_match_words("city", 1, fields_version="f1")
+    assert tables.reads.count(DATASET_FIELDS_SQL) == 1
+
+def test_local_invalidation_rebuilds_the_dataset_trie(tables):
+    util = SpacyUtil()
+    util.prefix_match_words("city", 1)
+    tables.dataset_fields[1].append(TPV)
+    util.invalidate_dataset(1)
+    assert matched(util.prefix_match_words("total tpv", 1)) == {TPV}
+
+def test_inserted_alias_is_matched_without_a_full_rebuild(tables, monkeypatch):
+    monkeypatch.setattr(settings, "LEXICON_CHECK_SECONDS", 0)
+    util = SpacyUtil()
+    util.prefix_match_words("city")
+    # The router commits the alias, which moves the stamp, then hands it over
+    tables.aliases["town"] = CITY
+    tables.version = "v2"
+    util.insert_words([WordWithNature("town", CITY)])
+    assert matched(util.prefix_match_words("by town")) == {CITY}
+    assert tables.reads.count(LEXICON_SQL) == 1
+
+def test_inserted_alias_reaches_other_workers_through_the_snapshot(tables, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "LEXICON_SNAPSHOT_PATH", str(tmp_path / "lexicon.bin"))
+    util, other = SpacyUtil(), SpacyUtil()
+    util.prefix_match_words("city")
+    tables.aliases["town"] = CITY
+    tables.version = "v2"
+    util.insert_words([WordWithNature("town", CITY)])
+    assert matched(other.prefix_match_words("by town")) == {CITY}
+    assert tables.reads.count(LEXICON_SQL) == 1
+
+def test_dataset_fields_given_by_the_catalog_are_not_read(tables):
+    util = SpacyUtil()
+    assert matched(util.prefix_match_words("total tpv by city", 1, fields_version="f1", fields=frozenset({TPV}))) == {TPV}
+    assert DATASET_FIELDS_SQL not in tables.reads
+
+def test_lexicon_checked_on_the_event_loop_is_not_checked_again_when_matching(tables, monkeypatch):
+    monkeypatch.setattr(settings, "LEXICON_CHECK_SECONDS", 0)
+    util = SpacyUtil()
+    asyncio.run(util.check_lexicon())
+    tables.aliases["town"] = CITY
+    tables.version = "v2"
+    reads = len(tables.reads)
+    assert matched(util.prefix_match_words("by town")) == set()
+    assert len(tables.reads) == reads
+    asyncio.run(util.check_lexicon())
+    assert matched(util.prefix_match_words("by town")) == {CITY}
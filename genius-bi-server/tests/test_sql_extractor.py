@@ -0,0 +1,14 @@
+from src.llm.sql_extractor import SQLExtractor
+
+def extract(chunks: list) -> str:
+    extractor = SQLExtractor()
+    sql = "".join(extractor.feed(chunk) for chunk in chunks)
+    return sql + extractor.finish()
+
+def test_prose_starting_with_with_is_skipped():
+    answer = ["With the schema given, the total is:\n", "select sum(`total tpv`) from transaction;"]
+    assert extract(answer) == "select sum(`total tpv`) from transaction"
+
+def test_with_clause_starts_the_statement():
+    answer = ["Here it is:\nWITH t ", "AS (select `city` from transaction)\n", "select * from t;"]
+    assert extract(answer) == "WITH t AS (select `city` from transaction)\nselect * from t"
@@ -0,0 +1,57 @@
+from datetime import date
+
+from src.utils.sql_rewrite import add_partition_filter, parse_sql, resolve_aliases
+from src.utils.time_range import parse_time_ranges
+
+WINDOW_START = "2026-07-20 00:00:00"
+
+def partition(sql: str, query: str, time_fields=frozenset({"transaction time"})):
+    tree = parse_sql(sql)
+    ranges = parse_time_ranges(query, date(2026, 10, 18))
+    window = add_partition_filter(tree, "transaction", "partition date", set(time_fields), ranges, WINDOW_START)
+    return tree.sql(dialect="mysql"), window
+
+def test_range_on_another_time_field_is_carried_over():
+    sql, window = partition("select sum(`total tpv`) from transaction where `transaction time` >= '2024-01-01 00:00:00' "
+                            "and `transaction time` <= '2024-12-31 23:59:59'", "total tpv in 2024 of transaction time")
+    assert not window
+    assert WINDOW_START not in sql
+    assert "`partition date` >= '2024-01-01 00:00:00'" in sql
+    assert "`partition date` <= '2024-12-31 23:59:59'" in sql
+
+def test_range_stated_only_in_the_question_is_used():
+    sql, window = partition("select sum(`total tpv`) from transaction", "total tpv in q1 2024", time_fields=())
+    assert not window
+    assert "`partition date` >= '2024-01-01 00:00:00'" in sql
+    assert "`partition date` <= '2024-03-31 23:59:59'" in sql
+
+def test_window_without_any_range():
+    sql, window = partition("select sum(`total tpv`) from transaction", "total tpv by city")
+    assert window
+    assert f"`partition date` >= '{WINDOW_START}'" in sql
+
+def test_condition_on_the_partition_field_is_kept():
+    sql, window = partition("select sum(`total tpv`) from transaction where `partition date` >= '2025-01-01 00:00:00'", "total tpv since 2025")
+    assert not window
+    assert sql.count("`partition date`") == 1
+
+def test_open_range_only_bounds_one_side():
+    sql, window = partition("select sum(`total tpv`) from transaction", "total tpv since 2024-01-01", time_fields=())
+    assert not window
+    assert "`partition date` >= '2024-01-01 00:00:00'" in sql
+    assert "<=" not in sql
+
+def resolve(sql: str) -> str:
+    tree = parse_sql(sql)
+    columns = {"total tpv": ("fact", "amount"), "city": ("merchant", "city_name")}
+    resolve_aliases(tree, "transaction", columns, lambda tables: ("fact", [("merchant", "fact.merchant_id = merchant.id")]))
+    return tree.sql(dialect="mysql")
+
+def test_order_by_an_output_alias_is_kept():
+    sql = resolve("select `city`, sum(`total tpv`) as `total tpv` from transaction group by `city` order by `total tpv` desc")
+    assert "SUM(fact.amount) AS `total tpv`" in sql
+    assert "ORDER BY `total tpv` DESC" in sql
+
+def test_aggregate_in_having_reads_the_field():
+    sql = resolve("select `city`, sum(`total tpv`) as `total tpv` from transaction group by `city` having sum(`total tpv`) > 100")
+    assert "HAVING SUM(fact.amount) > 100" in sql
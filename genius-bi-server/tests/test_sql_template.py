@@ -0,0 +1,29 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip("spacy")
+pytest.importorskip("sqlalchemy")
+
+from src.models.nature import Nature
+from src.utils.sql_template import SQLTemplates
+
+MAPPING = {"total tpv": Nature.of(2, 1, 1), "is cross border payment": Nature.of(1, 1, 2)}
+TODAY = date(2025, 6, 5)
+
+def generate(query, metric_types):
+    return SQLTemplates().generate(query, "transaction", MAPPING, metric_types, today=TODAY)
+
+def test_atom_metric_is_summed():
+    assert generate("show me total tpv by is cross border payment", {"total tpv": "atom"}) == \
+        "select `is cross border payment`, sum(`total tpv`) from transaction group by `is cross border payment`"
+
+def test_atom_metric_is_averaged_when_asked():
+    assert generate("average total tpv by is cross border payment", {"total tpv": "atom"}) == \
+        "select `is cross border payment`, avg(`total tpv`) from transaction group by `is cross border payment`"
+
+def test_derived_metric_is_left_to_the_llm():
+    assert generate("show me total tpv by is cross border payment", {"total tpv": "derived"}) is None
+
+def test_metric_of_unknown_type_is_left_to_the_llm():
+    assert generate("show me total tpv by is cross border payment", {}) is None
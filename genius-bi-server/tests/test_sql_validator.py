@@ -0,0 +1,17 @@
+from src.models.nature import Nature
+from src.utils.sql_validator import validate_sql
+
+MAPPING = {"total tpv": Nature.of(2, 1, 1), "transaction time": Nature.of(1, 1, 3)}
+
+def test_stated_range_without_a_filter_is_reported():
+    problems = validate_sql("select sum(`total tpv`) from transaction", "total tpv in 2024 of transaction time", "transaction", MAPPING)
+    assert "time range of the question is not filtered on" in problems
+
+def test_stated_range_with_its_filter_passes():
+    sql = ("select sum(`total tpv`) from transaction where `transaction time` >= '2024-01-01 00:00:00' "
+           "AND `transaction time` <= '2024-12-31 23:59:59'")
+    assert validate_sql(sql, "total tpv in 2024 of transaction time", "transaction", MAPPING) == []
+
+def test_grouping_by_a_period_states_no_range():
+    problems = validate_sql("select sum(`total tpv`) from transaction", "total tpv by month", "transaction", MAPPING)
+    assert "time range of the question is not filtered on" not in problems
@@ -0,0 +1,17 @@
+from datetime import date
+
+from src.utils.time_range import covered_days
+
+TODAY = date(2026, 10, 18)
+
+def test_since_and_from_leave_the_range_open():
+    assert covered_days("total tpv since 2024-01-01 of transaction time", TODAY) == [(date(2024, 1, 1), None)]
+    assert covered_days("total tpv from 2024-03-01", TODAY) == [(date(2024, 3, 1), None)]
+    assert covered_days("total tpv before march 2024", TODAY) == [(None, date(2024, 2, 29))]
+
+def test_from_to_is_a_closed_range():
+    assert covered_days("from 2024-01-01 to 2024-03-31", TODAY) == [(date(2024, 1, 1), date(2024, 3, 31))]
+
+def test_bare_numbers_are_not_years():
+    assert covered_days("payments over 2000", TODAY) == []
+    assert covered_days("payments in 2024", TODAY) == [(date(2024, 1, 1), date(2024, 12, 31))]
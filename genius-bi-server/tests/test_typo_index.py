@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("spacy")
+pytest.importorskip("sqlalchemy")
+
+from src.models.nature import Nature, NatureKind
+from src.utils.spacy_util import SentenceTrie
+from src.utils.typo_index import TypoIndex
+
+def index_of(*aliases):
+    trie = SentenceTrie()
+    for i, alias in enumerate(aliases):
+        trie.insert(alias, Nature.of(NatureKind.DIMENSION, 1, i + 1))
+    trie.compile()
+    return trie, TypoIndex(trie.vocabulary())
+
+def test_short_alias_with_a_doubled_letter_is_corrected():
+    trie, index = index_of("city", "total tpv")
+    assert index.correct(["total", "tpv", "by", "citty"], trie) == ["total", "tpv", "by", "city"]
+
+def test_short_alias_with_a_dropped_letter_is_corrected():
+    trie, index = index_of("country", "total tpv")
+    assert index.correct(["by", "contry"], trie) == ["by", "country"]
+
+def test_ambiguous_short_typo_is_left_alone():
+    trie, index = index_of("city", "cite")
+    assert index.correct(["by", "citye"], trie) == ["by", "citye"]
+
+def test_substituted_letter_is_not_taken_for_a_short_alias():
+    trie, index = index_of("rate")
+    assert index.correct(["by", "date"], trie) == ["by", "date"]
+
+def test_word_only_inside_an_alias_is_not_corrected_without_context():
+    trie, index = index_of("order city")
+    assert index.correct(["by", "citty"], trie) == ["by", "citty"]